@@ -4,18 +4,25 @@
 # Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
 # Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
 
-from io import open
-from json import dumps, load, loads
 from pathlib import Path
 from urllib.parse import urlparse
 
 from pygments import formatters, highlight, lexers
 from robot.api import logger
 from urllib3 import disable_warnings  # type: ignore[import-untyped]
-from yaml import SafeLoader
-from yaml import load as load_yaml
 
+from .aggregate import EndpointSchemas
+from .codec import dumps, loads
+from .compression import accept_encoding
+from .files import input_path, read_file, read_json_file
+from .history import RETENTIONS, InstanceHistory
+from .instance import to_json
+from .journal import Journal
 from .keywords import Keywords
+from .parallel import ParallelValidator
+from .retry import new_policy
+from .transport import Resolver, new_transport
+from .validators import VALIDATORS, ValidatorCache
 from .version import __version__
 
 
@@ -63,6 +70,49 @@ class REST(Keywords):
     [https://json-schema.org/draft/2020-12/schema|draft 2020-12] can be configured
     by setting ``"$schema"`` in the schema passed to the library.
 
+    The validations are done with [https://pypi.org/project/jsonschema|jsonschema]
+    by default. With ``validator=compiled`` on library import, the schemas
+    validated against more than once, e.g. those of `Expect Response Body`,
+    are compiled to Python code with [https://pypi.org/project/fastjsonschema|fastjsonschema],
+    which validates large responses many times faster. The schemas having
+    keywords it does not validate the same way, e.g. ``$ref`` or ``format``,
+    and the responses failing the validation, are still validated with
+    jsonschema, so the errors are the same. Install it with
+    ``pip install RESTinstance[compiled]``.
+
+    | Library | REST | https://api.example.com | validator=compiled |
+
+    With ``validation_workers`` on library import, the items of arrays having
+    10000 items or more, e.g. those of large paginated responses, are
+    validated in as many worker processes. The workers are started for
+    the first such array, and kept until the end of the test suite.
+    The errors reported are the same as without the workers.
+
+    A failed validation reports only its first error by default. More of
+    them, in the order they are found, are reported with
+    ``validation_errors`` on library import.
+
+    | Library | REST | https://api.example.com | validation_workers=16 | validation_errors=10 |
+
+    The schemas are inferred only when they are first needed, i.e. by
+    the assertion keywords, `Output Schema` or `RESTinstances`, so requests
+    that are not asserted on do not spend time on it. The inference can
+    also be switched off on library import with ``infer_schema=false``,
+    e.g. for load-style suites, in which case the schemas only have
+    the expectations and what the assertion keywords add to them.
+
+    For very large arrays, the inference can be limited with ``sample_items``
+    on library import, or with `GET` and `POST`. Arrays having over twice
+    as many items are then inferred from their first ``sample_items`` and
+    as many random items. Such schemas have a ``$comment`` telling so.
+
+    | Library | REST | https://api.example.com | sample_items=100 |
+    | `GET` | /exports/users | sample_items=1000 |
+
+    With ``aggregate_schemas=true`` on library import, the schemas are also
+    merged per endpoint over all the requests of the suite, as they are made.
+    Output them with `Output Endpoint Schemas`.
+
     = The scope =
 
     All the assertion keywords, `Output` and `Output Schema` are effective
@@ -79,6 +129,176 @@ class REST(Keywords):
     All instances can be output to a file with `RESTinstances` which can
     be useful for additional logging.
 
+    For long running suites, the instances kept can be limited
+    on library import:
+
+    ``max_instances``: The number of the last instances to retain fully.
+    By default 0, retaining all of them.
+
+    ``retention``: What is kept of the older instances, either ``summary``
+    (the default) or ``drop``. A summary has the request ``method``, ``url``
+    and ``timestamp``, and the response ``status``, ``seconds`` and ``timings``.
+
+    | Library | REST | https://api.example.com | max_instances=100 | retention=drop |
+
+    ``journal``: A file to write the instances to as JSON lines, one
+    instance per line, while the suite runs. The file is gzip compressed
+    if its name ends with ``.gz``. An instance is written when the next
+    request is made, or at the end of the test suite for the last one,
+    so a crashed run loses at most the last instance.
+    `RESTinstances` then converts the journal instead of the instances
+    in memory, which is why it is best used together with ``max_instances``.
+
+    | Library | REST | https://api.example.com | max_instances=10 | journal=${OUTPUTDIR}/instances.jsonl.gz |
+
+    = Files =
+
+    Wherever JSON is accepted, also a path to a JSON or YAML file is,
+    e.g. for ``spec`` and `Expect Response`. A path can be prefixed with
+    ``file:`` to tell it is one. The files are parsed once per process,
+    and again only if they are modified.
+
+    Parsed YAML documents can also be stored in a cache directory shared
+    by the runs, so that large specs are not parsed again on every import.
+    The directory is given with the ``RESTINSTANCE_CACHE_DIR`` environment
+    variable, without it the documents are not cached on disk. The cached
+    documents are not removed by the library, so the directory is best
+    cleaned up together with the specs, e.g. by the CI job.
+
+    = Connections =
+
+    The library keeps one HTTP session per library instance, so consecutive
+    requests to the same host reuse pooled connections instead of opening
+    a new TCP (and TLS) connection for each request. The session is closed
+    when the library goes out of scope, i.e. at the end of the test suite.
+
+    The pool is configured on library import:
+
+    ``pool_connections``: The number of hosts to keep a connection pool for.
+
+    ``pool_maxsize``: The maximum number of connections kept per host.
+
+    ``max_retries``: The number of times a failed connection is retried.
+    Only connection errors are retried, never requests that reached the server.
+
+    ``keep_alive``: If false, ``Connection: close`` is sent with every request
+    and no connections are reused.
+
+    Whether the connection was reused is seen in ``response connection reused``
+    of the created instance.
+
+    The SSL contexts are created once per the combination of `Set SSL Verify`
+    and `Set Client Cert`, and again only if their files are modified.
+    New connections to a host resume the TLS session of the previous one,
+    which is seen in ``response connection tlsResumed``.
+
+    | Library | REST | https://jsonplaceholder.typicode.com | pool_maxsize=20 | max_retries=2 |
+
+    Cookies are not persisted between requests by the session.
+
+    ``transport``: The HTTP client sending the requests, either ``requests``
+    (the default, HTTP/1.1) or ``http2``. The latter uses
+    [https://www.python-httpx.org|httpx] to negotiate HTTP/2 with servers
+    supporting it, multiplexing concurrent requests to the same host
+    over a single connection. Install it with ``pip install RESTinstance[http2]``.
+    The negotiated protocol is seen in ``response connection protocol``.
+
+    | Library | REST | https://api.example.com | transport=http2 |
+
+    ``dns_ttl``: The seconds to cache the resolved addresses of the hosts.
+    By default, hosts are resolved again for every new connection.
+
+    ``resolve``: A JSON object mapping host names, or ``host:port`` pairs,
+    to the IP addresses to connect to instead of resolving them,
+    like ``curl --resolve``. The ``Host`` header and TLS certificate checks
+    still use the host name in the URL.
+
+    | Library | REST | https://api.example.com | dns_ttl=300 |
+    | Library | REST | https://api.example.com | resolve={"api.example.com": "10.0.0.5"} |
+
+    ``compression``: If true, ``Accept-Encoding`` is sent with every request
+    for all the encodings the library can decompress: ``gzip`` and ``deflate``,
+    and ``br`` and ``zstd`` when [https://pypi.org/project/brotli|brotli] or
+    [https://pypi.org/project/zstandard|zstandard] are installed.
+    Compressed response bodies are decompressed while they are read, and
+    ``response compression`` of the created instance has:
+
+    - ``encoding``: The ``Content-Encoding`` of the response, ``null`` if none
+    - ``bytes``: The size of the body as transferred
+    - ``decodedBytes``: The size of the body after decompressing it
+    - ``seconds``: The time spent in decompressing
+
+    | Library | REST | https://api.example.com | compression=true |
+    | `GET` | /users | |
+    | `Integer` | response compression bytes | maximum=10000 |
+
+    = Retries =
+
+    Requests failing with a connection error, a timeout or one of the
+    retried response statuses can be retried. The retry options are given
+    as a JSON object on library import as ``retry``, and can be overridden
+    for a single request with the ``retry`` argument of the HTTP keywords:
+
+    - ``retries``: The number of retries, ``0`` by default
+    - ``statuses``: The retried response statuses, ``[429, 502, 503, 504]`` by default
+    - ``backoff``: The seconds to wait before the first retry, doubled for each next one
+    - ``maxDelay``: The maximum seconds to wait before retrying
+    - ``jitter``: If true (default), waits a random time up to the backoff
+    - ``retryAfter``: If true (default), waits as long as the ``Retry-After`` header says, up to ``maxDelay``
+    - ``idempotentOnly``: If true (default), POST and PATCH requests are never retried nor hedged
+    - ``hedge``: The seconds after which a second request is sent in parallel if there is no response yet, or a percentile of the previous latencies of the same request, e.g. ``"p95"``. The first response is used.
+
+    If the request is retried or hedged, ``response attempts`` of the created
+    instance has every attempt with its ``status`` or ``error``, ``seconds``,
+    the ``delay`` before the next attempt, and whether it was a ``hedge``.
+    The last response is used for the instance, even if its status was retried.
+
+    | Library | REST | https://api.example.com | retry={"retries": 3, "backoff": 0.5} |
+    | `GET` | /users | retry=5 |
+    | `GET` | /search | retry={"hedge": "p95"} |
+
+    = Timings =
+
+    Besides the total ``response seconds`` (from sending the request
+    until the response headers were parsed), ``response timings`` has
+    the phases of the request in seconds:
+
+    - ``dns``, ``connect``, ``tls``: Opening the connection, zero if reused
+    - ``ttfb``: From sending the request until the response headers arrived
+    - ``download``: Reading the response body after the headers
+    - ``total``: All of the above, including any redirects
+    - ``decode``: Parsing the response body as JSON
+    - ``validation``: Validating against the expectations and the spec
+    - ``inference``: Generating the schemas for the instance, once needed
+
+    The first phases are ``null`` if they could not be measured,
+    e.g. when connecting through a SOCKS proxy.
+
+    | `Number` | response timings ttfb | maximum=0.2 |
+
+    = Streaming =
+
+    Very large response bodies can be parsed while they are downloaded by
+    using ``stream=true`` with `GET` or `POST`. Instead of the whole body,
+    only the parts given as ``projection`` are kept in ``response body``,
+    at the same positions as in the body, so that the same JSONPath queries
+    work for them. Array items not having the projected parts are ``null``.
+    Projections can only have property names and ``[*]``.
+
+    The rest of the body is summarized in ``response stream``:
+
+    - ``bytes``: The size of the (decompressed) body
+    - ``items``: The number of items of the root array, or properties of the root object
+    - ``shape``: The JSON Schema inferred for the whole body
+
+    The decode timing includes downloading the body when streaming.
+    Streaming requires [https://pypi.org/project/ijson|ijson],
+    install it with ``pip install RESTinstance[stream]``.
+
+    | `GET` | /exports/users | projection=["$.total", "$.users[*].email"] |
+    | `String` | $.users[*].email | format=email |
+    | `Integer` | response stream items | 2 |
+
     = Known Issues =
 
     There is a [known issue](https://github.com/h2non/jsonpath-ng/issues/38) JSONPath parsing for keys with numerical values
@@ -87,14 +307,15 @@ class REST(Keywords):
     """
 
     ROBOT_LIBRARY_SCOPE = "TEST SUITE"
+    ROBOT_LISTENER_API_VERSION = 3
 
-    # Altogether 24 keywords        context:
+    # Altogether 29 keywords        context:
     # -------------------------------------------------------
-    # 2 setting keywords            next instances
+    # 3 setting keywords            next instances
     # 3 expectation keywords        next instances
-    # 7 operation keywords          next instance
+    # 10 operation keywords         next instances
     # 8 assertion keywords          last instance's schema
-    # 4 I/O keywords                the last instance or none
+    # 5 I/O keywords                the last instance or none
     # -------------------------------------------------------
 
     def __init__(
@@ -109,6 +330,24 @@ class REST(Keywords):
         spec={},
         instances=[],
         loglevel="WARN",
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=0,
+        keep_alive=True,
+        transport="requests",
+        compression=False,
+        dns_ttl=0,
+        resolve={},
+        retry={},
+        max_instances=0,
+        retention="summary",
+        journal=None,
+        infer_schema=True,
+        sample_items=0,
+        aggregate_schemas=False,
+        validator="jsonschema",
+        validation_workers=0,
+        validation_errors=1,
     ):
         self.request = {
             "method": None,
@@ -130,6 +369,7 @@ class REST(Keywords):
             "cert": None,
             "sslVerify": REST._input_ssl_verify(ssl_verify),
             "allowRedirects": True,
+            "retry": REST._input_retry(retry),
         }
         if url:
             url = REST._input_string(url)
@@ -165,19 +405,58 @@ class REST(Keywords):
                 "in the future. Please migrate to OpenAPI 3.x."
             )
         self._spec = None
-        self.instances = self._input_array(instances)
+        self.instances = InstanceHistory(
+            self._input_array(instances),
+            REST._input_integer(max_instances),
+            REST._input_retention(retention),
+            Journal(REST._input_string(journal)) if journal else None,
+        )
         self.log_level = self._input_log_level(loglevel)
+        self.infer_schema = REST._input_boolean(infer_schema)
+        self.sample_items = REST._input_integer(sample_items)
+        self._endpoint_schemas = None
+        if REST._input_boolean(aggregate_schemas):
+            self._endpoint_schemas = EndpointSchemas(self.sample_items)
         self.auth = None
+        self._latencies = {}
+        self._templates = {}
+        self._expected = None
+        self._validators = ValidatorCache(
+            compiled=REST._input_validator(validator) == "compiled"
+        )
+        self.validation_errors = REST._input_integer(validation_errors)
+        self._parallel = None
+        if REST._input_integer(validation_workers):
+            self._parallel = ParallelValidator(
+                self._validators,
+                REST._input_integer(validation_workers),
+                self.validation_errors,
+            )
+        self._transport = new_transport(
+            REST._input_string(transport),
+            REST._input_integer(pool_connections),
+            REST._input_integer(pool_maxsize),
+            REST._input_integer(max_retries),
+            REST._input_boolean(keep_alive),
+            REST._input_boolean(compression),
+            Resolver(
+                REST._input_number(dns_ttl),
+                REST._input_resolve(resolve),
+            ),
+        )
+        if self._transport.compression:
+            self.request["headers"]["Accept-Encoding"] = accept_encoding()
+        self.ROBOT_LIBRARY_LISTENER = self
+
+    def close(self):
+        self._transport.close()
+        self.instances.close()
+        if self._parallel:
+            self._parallel.close()
 
     @staticmethod
     def log_json(json, header="", also_console=True, sort_keys=False):
-        json = dumps(
-            json,
-            ensure_ascii=False,
-            indent=4,
-            separators=(",", ": "),
-            sort_keys=sort_keys,
-        )
+        json = dumps(json, indent=4, sort_keys=sort_keys, default=to_json)
         logger.info(f"{header}\n{json}")  # no coloring for log.html
         if also_console:
             json_data = highlight(
@@ -244,13 +523,9 @@ class REST(Keywords):
         if isinstance(value, (dict)):
             return value
         try:
-            try:
-                is_file = Path(value).is_file()
-            except OSError:
-                # Handle cases where path is too long or invalid
-                is_file = False
-            if is_file:
-                json_value = REST._input_json_from_file(value)
+            path = input_path(value)
+            if path is not None:
+                json_value = REST._input_json_from_file(path)
             else:
                 json_value = loads(value)
             if not isinstance(json_value, (dict)):
@@ -268,13 +543,9 @@ class REST(Keywords):
         if isinstance(value, (list)):
             return value
         try:
-            try:
-                is_file = Path(value).is_file()
-            except OSError:
-                # Handle cases where path is too long or invalid
-                is_file = False
-            if is_file:
-                json_value = REST._input_json_from_file(value)
+            path = input_path(value)
+            if path is not None:
+                json_value = REST._input_json_from_file(path)
             else:
                 json_value = loads(value)
             if not isinstance(json_value, (list)):
@@ -289,19 +560,7 @@ class REST(Keywords):
 
     @staticmethod
     def _input_json_from_file(path):
-        try:
-            with open(path, encoding="utf-8") as file:
-                return load(file)
-        except OSError as e:
-            raise RuntimeError(f"File '{path}' cannot be opened:\n{e}")
-        except ValueError as e:
-            try:
-                with open(path, encoding="utf-8") as file:
-                    return load_yaml(file, Loader=SafeLoader)
-            except ValueError:
-                raise RuntimeError(
-                    f"File '{path}' is not valid JSON or YAML:\n{e}"
-                )
+        return read_json_file(path)
 
     @staticmethod
     def _input_json_as_string(string):
@@ -310,7 +569,7 @@ class REST(Keywords):
     @staticmethod
     def _input_json_from_non_string(value):
         try:
-            return REST._input_json_as_string(dumps(value, ensure_ascii=False))
+            return REST._input_json_as_string(dumps(value))
         except ValueError:
             raise RuntimeError("Input is not valid JSON: %s" % (value))
 
@@ -401,6 +660,29 @@ class REST(Keywords):
                 return value
         return [value, value]
 
+    @staticmethod
+    def _input_resolve(value):
+        value = REST._input_object(value)
+        for host, addresses in value.items():
+            if isinstance(addresses, str):
+                addresses = [addresses]
+            if not isinstance(addresses, list) or not all(
+                isinstance(address, str) for address in addresses
+            ):
+                raise RuntimeError(
+                    "Pinned addresses of %s are not a string " % (host)
+                    + "or an array of strings: %s" % (addresses)
+                )
+        return value
+
+    @staticmethod
+    def _input_retry(value, base=None):
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if not isinstance(value, int) or isinstance(value, bool):
+            value = REST._input_object(value)
+        return new_policy(value, base)
+
     @staticmethod
     def _input_data(value):
         try:
@@ -409,20 +691,35 @@ class REST(Keywords):
             if isinstance(value, bytes):
                 data = value
             else:
-                try:
-                    is_file = Path(value).is_file()
-                except OSError:
-                    # Handle cases where path is too long or invalid
-                    is_file = False
-                if is_file:
-                    with open(value, "rb") as file:
-                        data = file.read()
+                path = input_path(value)
+                if path is not None:
+                    data = read_file(path)
                 else:
                     raise RuntimeError(
                         "Data is not a dictionary, bytes, or path to a file"
                     )
         return data
 
+    @staticmethod
+    def _input_retention(value):
+        value = REST._input_string(value)
+        if value not in RETENTIONS:
+            raise RuntimeError(
+                "Retention is not one of %s: %s"
+                % (", ".join(RETENTIONS), value)
+            )
+        return value
+
+    @staticmethod
+    def _input_validator(value):
+        value = REST._input_string(value)
+        if value not in VALIDATORS:
+            raise RuntimeError(
+                "Validator is not one of %s: %s"
+                % (", ".join(VALIDATORS), value)
+            )
+        return value
+
     @staticmethod
     def _input_log_level(loglevel):
         if loglevel.upper() not in (
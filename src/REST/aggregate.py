@@ -0,0 +1,96 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import re
+
+from genson import SchemaBuilder
+
+from .inference import SAMPLED_COMMENT, reduce_value
+
+# Path segments taken for identifiers: numbers, UUIDs and long hex strings
+IDENTIFIER = re.compile(
+    r"^(\d+|[0-9a-fA-F]{8}(-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}"
+    r"|[0-9a-fA-F]{16,})$"
+)
+
+
+def path_template(path):
+    """Returns ``path`` with the identifier segments replaced with ``{id}``."""
+    return "/".join(
+        "{id}" if IDENTIFIER.match(segment) else segment
+        for segment in path.split("/")
+    )
+
+
+class EndpointSchemas:
+    """Schemas merged from all the requests and responses of each endpoint.
+
+    An endpoint is the HTTP method and the path template, e.g.
+    ``GET /users/{id}``. The request query and body, and the response body
+    per status code, are each merged into a schema as the responses arrive.
+    """
+
+    def __init__(self, sample_items=0):
+        self.sample_items = sample_items
+        self.endpoints = {}
+
+    def add(self, request, response):
+        endpoint = "{} {}".format(
+            request["method"], path_template(request["path"])
+        )
+        schemas = self.endpoints.get(endpoint)
+        if schemas is None:
+            schemas = self.endpoints[endpoint] = {
+                "requests": 0,
+                "query": _EndpointSchema(),
+                "body": _EndpointSchema(),
+                "responses": {},
+            }
+        schemas["requests"] += 1
+        schemas["query"].add(request["query"])
+        if request["body"] is not None:
+            schemas["body"].add(request["body"], self.sample_items)
+        status = str(response["status"])
+        if status not in schemas["responses"]:
+            schemas["responses"][status] = _EndpointSchema()
+        schemas["responses"][status].add(response["body"], self.sample_items)
+
+    def to_json(self):
+        return {
+            endpoint: {
+                "requests": schemas["requests"],
+                "request": {
+                    "query": schemas["query"].to_schema(),
+                    "body": schemas["body"].to_schema(),
+                },
+                "responses": {
+                    status: schema.to_schema()
+                    for status, schema in schemas["responses"].items()
+                },
+            }
+            for endpoint, schemas in self.endpoints.items()
+        }
+
+
+class _EndpointSchema:
+    def __init__(self):
+        self.builder = SchemaBuilder(schema_uri=False)  # type: ignore[arg-type]
+        self.sample_items = 0
+
+    def add(self, value, sample_items=0):
+        value, sampled = reduce_value(value, sample_items)
+        self.builder.add_object(value)
+        if sampled:
+            self.sample_items = sample_items
+
+    def to_schema(self):
+        schema = self.builder.to_schema()
+        if self.sample_items:
+            schema["$comment"] = SAMPLED_COMMENT % (
+                self.sample_items,
+                self.sample_items,
+            )
+        return schema
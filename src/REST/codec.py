@@ -0,0 +1,89 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import json
+import re
+
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:
+    orjson = None
+
+# orjson parses integers below the 64 bit signed minimum and over the 64 bit
+# unsigned maximum as floats, so numbers of 19 digits or more, of either sign,
+# are left to the standard library
+LONG_NUMBER = re.compile(r"-?[0-9]{19,}")
+LONG_NUMBER_BYTES = re.compile(rb"-?[0-9]{19,}")
+
+
+def loads(string):
+    """Parses JSON from ``string``, either text or UTF-8 encoded bytes."""
+    if orjson is not None:
+        if isinstance(string, (bytes, bytearray)):
+            long_number = LONG_NUMBER_BYTES.search(string)
+        else:
+            long_number = LONG_NUMBER.search(string)
+        if not long_number:
+            try:
+                return orjson.loads(string)
+            except orjson.JSONDecodeError:
+                # Raises the same error, or parses what orjson does not,
+                # e.g. NaN
+                pass
+    return json.loads(string)
+
+
+def load(file):
+    return loads(file.read())
+
+
+def dumps(value, indent=None, sort_keys=False, default=None):
+    """Serializes ``value`` to JSON text, keeping non-ASCII characters.
+
+    The output is the same as with the standard library when given
+    ``ensure_ascii=False``, and ``separators=(",", ": ")`` if indented.
+    Compact output may have less whitespace. With orjson, NaN and
+    infinities are output as ``null``.
+    """
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        try:
+            text = orjson.dumps(value, default=default, option=options)
+        except (orjson.JSONEncodeError, TypeError):
+            pass
+        else:
+            text = text.decode("utf-8")
+            if indent:
+                text = _reindent(text, indent)
+            return text
+    if indent:
+        return json.dumps(
+            value,
+            ensure_ascii=False,
+            indent=indent,
+            separators=(",", ": "),
+            sort_keys=sort_keys,
+            default=default,
+        )
+    return json.dumps(
+        value, ensure_ascii=False, sort_keys=sort_keys, default=default
+    )
+
+
+def _reindent(text, indent):
+    # Newlines in strings are escaped, so all leading spaces are indentation
+    if indent == 2:
+        return text
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        stripped = line.lstrip(" ")
+        depth = (len(line) - len(stripped)) // 2
+        lines[i] = " " * (depth * indent) + stripped
+    return "\n".join(lines)
@@ -0,0 +1,198 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import zlib
+from time import perf_counter_ns
+
+try:
+    import brotlicffi as brotli  # type: ignore[import-not-found]
+except ImportError:
+    try:
+        import brotli  # type: ignore[import-not-found,no-redef]
+    except ImportError:
+        brotli = None
+
+try:
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:
+    try:
+        import zstandard as zstd  # type: ignore[import-not-found,no-redef]
+    except ImportError:
+        zstd = None
+
+
+def accept_encoding():
+    encodings = ["gzip", "deflate"]
+    if brotli:
+        encodings.append("br")
+    if zstd:
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+class _GzipDecoder:
+    def __init__(self):
+        self.decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decompress(self, data):
+        output = self.decoder.decompress(data)
+        # Concatenated gzip members are allowed
+        while self.decoder.unused_data:
+            data = self.decoder.unused_data
+            self.decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            output += self.decoder.decompress(data)
+        return output
+
+    def flush(self):
+        return self.decoder.flush()
+
+
+class _DeflateDecoder:
+    def __init__(self):
+        self.decoder = zlib.decompressobj()
+        self.first = b""
+
+    def decompress(self, data):
+        if self.first is None:
+            return self.decoder.decompress(data)
+        self.first += data
+        try:
+            output = self.decoder.decompress(self.first)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib wrapper
+            self.decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            output = self.decoder.decompress(self.first)
+        self.first = None
+        return output
+
+    def flush(self):
+        return self.decoder.flush()
+
+
+class _BrotliDecoder:
+    def __init__(self):
+        self.decoder = brotli.Decompressor()
+
+    def decompress(self, data):
+        if hasattr(self.decoder, "process"):
+            return self.decoder.process(data)
+        return self.decoder.decompress(data)
+
+    def flush(self):
+        if hasattr(self.decoder, "finish"):
+            return self.decoder.finish() or b""
+        return b""
+
+
+class _ZstdDecoder:
+    def __init__(self):
+        if hasattr(zstd, "ZstdDecompressor") and hasattr(
+            zstd.ZstdDecompressor, "decompressobj"
+        ):
+            self.decoder = zstd.ZstdDecompressor().decompressobj()
+        else:
+            self.decoder = zstd.ZstdDecompressor()
+
+    def decompress(self, data):
+        return self.decoder.decompress(data)
+
+    def flush(self):
+        return b""
+
+
+DECODERS = {
+    "gzip": _GzipDecoder,
+    "x-gzip": _GzipDecoder,
+    "deflate": _DeflateDecoder,
+}
+if brotli:
+    DECODERS["br"] = _BrotliDecoder
+if zstd:
+    DECODERS["zstd"] = _ZstdDecoder
+
+
+class DecodingRaw:
+    """Decompresses the raw body of a response while it is being read.
+
+    Wraps the raw response of the transport, reading the still encoded
+    ``chunks`` from it, and measures the time spent only in decompressing.
+    Encodings that cannot be decoded are left as they are.
+    """
+
+    def __init__(self, raw, chunks, content_encoding):
+        self.raw = raw
+        self.chunks = iter(chunks)
+        self.encoding = ", ".join(
+            encoding.strip().lower()
+            for encoding in (content_encoding or "").split(",")
+            if encoding.strip()
+        )
+        # The last applied encoding is listed last, so it is decoded first
+        self.decoders = []
+        for encoding in reversed(self.encoding.split(", ")):
+            if encoding == "identity":
+                continue
+            if encoding not in DECODERS:
+                break
+            self.decoders.append(DECODERS[encoding]())
+        self.buffer = b""
+        self.flushed = False
+        self.compressed = self.uncompressed = self.decoding = 0
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    @property
+    def compression(self):
+        return {
+            "encoding": self.encoding or None,
+            "bytes": self.compressed,
+            "decodedBytes": self.uncompressed,
+            "seconds": self.decoding / 1e9,
+        }
+
+    def read(self, amt=None, *args, **kwargs):
+        parts = [self.buffer]
+        size = len(self.buffer)
+        while amt is None or amt < 0 or size < amt:
+            data = self._decode_next()
+            if data is None:
+                break
+            parts.append(data)
+            size += len(data)
+        data = b"".join(parts)
+        if amt is None or amt < 0:
+            amt = len(data)
+        data, self.buffer = data[:amt], data[amt:]
+        return data
+
+    def stream(self, amt=None, decode_content=None):
+        while True:
+            data = self.read(amt)
+            if not data:
+                return
+            yield data
+
+    def _decode_next(self):
+        chunk = next(self.chunks, None)
+        started = perf_counter_ns()
+        if chunk is not None:
+            self.compressed += len(chunk)
+            for decoder in self.decoders:
+                chunk = decoder.decompress(chunk)
+        elif not self.flushed:
+            self.flushed = True
+            chunk = b""
+            for i, decoder in enumerate(self.decoders):
+                tail = decoder.flush()
+                for following in self.decoders[i + 1 :]:
+                    tail = following.decompress(tail)
+                chunk += tail
+        else:
+            return None
+        self.decoding += perf_counter_ns() - started
+        self.uncompressed += len(chunk)
+        return chunk
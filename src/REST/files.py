@@ -0,0 +1,173 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import marshal
+import os
+import sys
+from collections import OrderedDict
+from copy import deepcopy
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+from yaml import YAMLError
+from yaml import load as load_yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+from .codec import loads
+
+FILE_PREFIX = "file:"
+
+# Inline JSON objects, arrays and strings are never probed for a file
+INLINE_JSON = ("{", "[", '"')
+
+# Files kept parsed for the process, the least recently used are dropped
+MAX_CACHED_FILES = 256
+
+# Directory of the YAML documents parsed in the previous runs, or empty
+CACHE_DIR_VARIABLE = "RESTINSTANCE_CACHE_DIR"
+
+# The marshal format may change between Python versions
+CACHE_VERSION = "%s-%d.%d" % (marshal.version, *sys.version_info[:2])
+
+_cache = OrderedDict()
+_lock = Lock()
+
+
+def input_path(value):
+    """Returns the file path ``value`` refers to, or None if it is not one.
+
+    A ``file:`` prefix tells ``value`` is a path, and the file must exist.
+    Without it, ``value`` is a path if such a file exists.
+    """
+    if not isinstance(value, str):
+        return None
+    if value.startswith(FILE_PREFIX):
+        path = value[len(FILE_PREFIX) :]
+        if not os.path.isfile(path):
+            raise RuntimeError(f"File '{path}' does not exist")
+        return path
+    if value.lstrip().startswith(INLINE_JSON):
+        return None
+    try:
+        is_file = os.path.isfile(value)
+    except (OSError, ValueError):
+        # Handle cases where path is too long or invalid
+        is_file = False
+    return value if is_file else None
+
+
+def read_file(path):
+    """Returns the content of the file as bytes, cached until it changes."""
+    return _cached(path, "bytes", _read_bytes)
+
+
+def read_json_file(path):
+    """Returns the file parsed as JSON, or YAML if it is not JSON.
+
+    The parsed value is cached until the file changes, and a copy of it
+    is returned, for the caller to modify.
+    """
+    return deepcopy(_cached(path, "json", _parse_json_or_yaml))
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def _cached(path, kind, parse):
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise RuntimeError(f"File '{path}' cannot be opened:\n{e}")
+    key = (os.path.abspath(path), kind)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(key)
+            return entry[1]
+    value = parse(path)
+    with _lock:
+        _cache[key] = (version, value)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_FILES:
+            _cache.popitem(last=False)
+    return value
+
+
+def _read_bytes(path):
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError as e:
+        raise RuntimeError(f"File '{path}' cannot be opened:\n{e}")
+
+
+def _parse_json_or_yaml(path):
+    content = _read_bytes(path)
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise RuntimeError(f"File '{path}' is not valid JSON or YAML:\n{e}")
+    try:
+        return loads(text)
+    except ValueError as e:
+        try:
+            return _load_yaml(text, content)
+        except (ValueError, YAMLError):
+            raise RuntimeError(f"File '{path}' is not valid JSON or YAML:\n{e}")
+
+
+def cache_dir():
+    """Returns the directory of parsed YAML documents, or None if disabled.
+
+    The directory is given with the ``RESTINSTANCE_CACHE_DIR`` environment
+    variable, and can be shared by parallel processes. Without the variable,
+    or with an empty value, the documents are not cached on disk.
+    """
+    return os.environ.get(CACHE_DIR_VARIABLE) or None
+
+
+def _load_yaml(text, content):
+    directory = cache_dir()
+    if directory is None:
+        return load_yaml(text, Loader=SafeLoader)
+    digest = sha256(content).hexdigest()
+    cached = os.path.join(directory, f"{digest}-{CACHE_VERSION}.marshal")
+    try:
+        with open(cached, "rb") as file:
+            return marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    value = load_yaml(text, Loader=SafeLoader)
+    try:
+        dumped = marshal.dumps(value)
+    except ValueError:
+        # Has YAML types like timestamps, which marshal does not support
+        return value
+    temporary = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with NamedTemporaryFile(
+            "wb", dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            temporary = file.name
+            file.write(dumped)
+        # Readers in the other processes see the whole file or none of it
+        os.replace(temporary, cached)
+    except OSError:
+        if temporary is not None:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+    return value
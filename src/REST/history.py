@@ -0,0 +1,76 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+RETENTIONS = ("summary", "drop")
+
+
+def summarize(instance):
+    """Returns the compact summary kept of an instance no longer retained."""
+    request = instance.get("request") or {}
+    response = instance.get("response") or {}
+    summary = {
+        "request": {
+            "method": request.get("method"),
+            "url": request.get("url"),
+        },
+        "response": {
+            "status": response.get("status"),
+            "seconds": response.get("seconds"),
+        },
+    }
+    if "timestamp" in request:
+        summary["request"]["timestamp"] = request["timestamp"]
+    if "timings" in response:
+        summary["response"]["timings"] = response["timings"]
+    return summary
+
+
+class InstanceHistory(list):
+    """The instances, of which only the last ``max_instances`` are retained.
+
+    The older instances are replaced with their summaries, or dropped,
+    depending on ``retention``. With ``max_instances`` of 0, all instances
+    are retained.
+
+    With a ``journal``, each instance is written to it when the next one
+    is appended, as the assertions may still update the last instance.
+    """
+
+    def __init__(
+        self, instances=(), max_instances=0, retention="summary", journal=None
+    ):
+        super().__init__()
+        self.max_instances = max_instances
+        self.retention = retention
+        self.journal = journal
+        # The summaries are always first, followed by the retained instances
+        self.summaries = 0
+        self.extend(instances)
+
+    def append(self, instance):
+        if self.journal is not None and self:
+            self.journal.write(self[-1])
+        super().append(instance)
+        if not self.max_instances:
+            return
+        while len(self) - self.summaries > self.max_instances:
+            if self.retention == "drop":
+                del self[self.summaries]
+            else:
+                self[self.summaries] = summarize(self[self.summaries])
+                self.summaries += 1
+
+    def extend(self, instances):
+        for instance in instances:
+            self.append(instance)
+
+    def close(self):
+        """Writes the last instance to the journal, and closes it."""
+        if self.journal is not None:
+            if self:
+                self.journal.write(self[-1])
+            self.journal.close()
+            self.journal = None
@@ -0,0 +1,166 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+from collections import OrderedDict
+from copy import deepcopy
+from random import sample
+from threading import Lock
+
+from genson import SchemaBuilder
+
+# Inferred schemas kept by the shape of the value, least recently used dropped
+MAX_SHAPES = 128
+
+SAMPLED_COMMENT = (
+    "Inferred from the first %d and %d random items of the longer arrays"
+)
+
+_schemas = OrderedDict()
+_lock = Lock()
+
+
+class _UnknownType(Exception):
+    pass
+
+
+def infer_schema(value, sample_items=0):
+    """Returns the same schema as GenSON ``SchemaBuilder`` does for ``value``.
+
+    GenSON only looks at the types of the values, so all the values with
+    the same shape have the same schema. The schema is inferred once per
+    shape, from a value of that shape having each distinct array item once.
+
+    With ``sample_items``, the arrays having over twice as many items are
+    inferred from their first ``sample_items`` and as many random items.
+    The schema is then annotated with a ``$comment`` telling so.
+    """
+    sampled = []
+    try:
+        shapes = {}
+        number = _shape(value, shapes, sample_items, sampled)
+        shape = _expand(number, list(shapes))
+    except (_UnknownType, RecursionError):
+        return _build_schema(value)
+    with _lock:
+        schema = _schemas.get(shape)
+        if schema is not None:
+            _schemas.move_to_end(shape)
+    if schema is None:
+        schema = _build_schema(_sample(shape))
+        with _lock:
+            _schemas[shape] = schema
+            if len(_schemas) > MAX_SHAPES:
+                _schemas.popitem(last=False)
+    # The instance schemas are modified by assertion keywords
+    schema = deepcopy(schema)
+    if sampled:
+        schema["$comment"] = SAMPLED_COMMENT % (sample_items, sample_items)
+    return schema
+
+
+def reduce_value(value, sample_items=0):
+    """Returns a value having the same schema as ``value``, but smaller.
+
+    It has each distinct array item only once, and is for giving to GenSON
+    ``add_object`` instead of ``value``. The second value returned tells if
+    the arrays were sampled, see ``infer_schema``.
+    """
+    sampled = []
+    try:
+        shapes = {}
+        number = _shape(value, shapes, sample_items, sampled)
+    except (_UnknownType, RecursionError):
+        return value, False
+    return _sample(_expand(number, list(shapes))), bool(sampled)
+
+
+def _build_schema(value):
+    builder = SchemaBuilder(schema_uri=False)  # type: ignore[arg-type]
+    builder.add_object(value)
+    return builder.to_schema()
+
+
+_SCALARS = {
+    type(None): "null",
+    bool: "boolean",
+    int: "integer",
+    float: "number",
+    str: "string",
+}
+
+_SAMPLES = {
+    "null": None,
+    "boolean": False,
+    "integer": 0,
+    "number": 0.0,
+    "string": "",
+}
+
+
+def _shape(value, shapes, sample_items, sampled):
+    # Objects and arrays are numbered by their shape, so that hashing
+    # the shape of their parent does not walk them again
+    scalar = _SCALARS.get(type(value))
+    if scalar is not None:
+        return scalar
+    if isinstance(value, dict):
+        shape = (
+            "object",
+            tuple(
+                [
+                    (key, _shape(item, shapes, sample_items, sampled))
+                    for key, item in value.items()
+                ]
+            ),
+        )
+    elif isinstance(value, list):
+        if sample_items and len(value) > sample_items * 2:
+            sampled.append(len(value))
+            value = value[:sample_items] + sample(
+                value[sample_items:], sample_items
+            )
+        shape = (
+            "array",
+            tuple(
+                dict.fromkeys(
+                    [
+                        _shape(item, shapes, sample_items, sampled)
+                        for item in value
+                    ]
+                )
+            ),
+        )
+    # GenSON does not take subclasses of numbers, unlike of strings
+    elif isinstance(value, str):
+        return "string"
+    else:
+        raise _UnknownType(type(value))
+    number = shapes.get(shape)
+    if number is None:
+        number = shapes[shape] = len(shapes)
+    return number
+
+
+def _expand(shape, numbered):
+    """Returns the numbered shape with its parts, comparable between values."""
+    if isinstance(shape, str):
+        return shape
+    kind, parts = numbered[shape]
+    if kind == "object":
+        return kind, tuple(
+            (key, _expand(part, numbered)) for key, part in parts
+        )
+    return kind, tuple(_expand(part, numbered) for part in parts)
+
+
+def _sample(shape):
+    """Returns a value of the shape, having each distinct array item once."""
+    if isinstance(shape, str):
+        return _SAMPLES[shape]
+    kind, parts = shape
+    if kind == "object":
+        return {key: _sample(part) for key, part in parts}
+    return [_sample(part) for part in parts]
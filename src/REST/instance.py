@@ -0,0 +1,85 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+from collections.abc import Mapping
+from copy import deepcopy
+
+from requests.auth import AuthBase
+
+
+class Instance(Mapping):
+    """A request and its response, and the JSON Schema for both.
+
+    Reads like the JSON object it is output as, having the properties
+    ``request``, ``response``, ``schema`` and ``spec``. The schema is only
+    built by ``new_schema`` when it is first needed, e.g. by an assertion.
+    """
+
+    __slots__ = ("request", "response", "spec", "_schema", "_new_schema")
+
+    KEYS = ("request", "response", "schema", "spec")
+
+    def __init__(self, request, response, spec, schema=None, new_schema=None):
+        self.request = request
+        self.response = response
+        self.spec = spec
+        self._schema = schema
+        self._new_schema = new_schema
+
+    @property
+    def schema(self):
+        if self._schema is None and self._new_schema is not None:
+            self._schema = self._new_schema()
+            self._new_schema = None
+        return self._schema
+
+    @schema.setter
+    def schema(self, schema):
+        self._schema = schema
+        self._new_schema = None
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return repr(self.to_json())
+
+    def __deepcopy__(self, memo):
+        return Instance(
+            deepcopy(self.request, memo),
+            deepcopy(self.response, memo),
+            deepcopy(self.spec, memo),
+            deepcopy(self.schema, memo),
+        )
+
+    def to_json(self):
+        return {key: self[key] for key in self.KEYS}
+
+
+def to_json(value):
+    """The ``default`` for serializing instances, and other objects as such.
+
+    Authentication is serialized as its class name only, so that
+    the credentials are not written to the output.
+    """
+    if isinstance(value, Instance):
+        return value.to_json()
+    if isinstance(value, AuthBase):
+        return type(value).__name__
+    return vars(value)
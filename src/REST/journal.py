@@ -0,0 +1,101 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import gzip
+from queue import Queue
+from threading import Thread
+
+from .codec import dumps, loads
+from .instance import to_json
+
+_STOP = object()
+
+
+def open_journal(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_journal(path):
+    """Yields the lines of the journal, also while it is being written."""
+    with open_journal(path, "r") as file:
+        try:
+            for line in file:
+                yield line.rstrip("\n")
+        except EOFError:
+            # A gzip journal has no trailer until it is closed
+            pass
+
+
+class Journal:
+    """Appends instances to a JSON lines file, on a background thread.
+
+    The file is gzip compressed if its name ends with ``.gz``.
+    Each line is flushed to the file before waiting for more instances,
+    so that the lines written are kept even if the process is killed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open_journal(path, "w")
+        self.queue = Queue()
+        self.error = None
+        self.thread = Thread(
+            target=self._write, name="RESTinstance journal", daemon=True
+        )
+        self.thread.start()
+
+    def write(self, instance):
+        if self.error is not None:
+            raise RuntimeError(
+                "Error writing instances to journal "
+                + f"'{self.path}':\n{self.error}"
+            )
+        self.queue.put(instance)
+
+    def flush(self):
+        """Waits until the instances given so far are in the file."""
+        self.queue.join()
+
+    def export(self, file, pending=(), sort_keys=False):
+        """Writes the journal and the ``pending`` instances as a JSON array."""
+        self.flush()
+        separator = "\n"
+        file.write("[")
+        for line in read_journal(self.path):
+            if sort_keys:
+                line = dumps(loads(line), sort_keys=True)
+            file.write(separator + line)
+            separator = ",\n"
+        for instance in pending:
+            file.write(
+                separator
+                + dumps(instance, sort_keys=sort_keys, default=to_json)
+            )
+            separator = ",\n"
+        file.write("]" if separator == "\n" else "\n]")
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+        self.file.close()
+
+    def _write(self):
+        while True:
+            instance = self.queue.get()
+            try:
+                if instance is _STOP:
+                    return
+                if self.error is None:
+                    self.file.write(dumps(instance, default=to_json) + "\n")
+                    if self.queue.empty():
+                        self.file.flush()
+            except (OSError, TypeError, ValueError) as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
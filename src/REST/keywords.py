@@ -7,12 +7,14 @@
 from __future__ import annotations
 
 import warnings
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from copy import deepcopy
 from datetime import datetime
-from io import open
-from json import dumps
+from functools import partial
+from io import BytesIO, open
 from pathlib import Path
+from time import perf_counter, perf_counter_ns, sleep
 from typing import Any, Literal, Union, cast
 from urllib.parse import parse_qsl, urljoin, urlparse
 
@@ -22,9 +24,7 @@ with warnings.catch_warnings():
 
 from genson import SchemaBuilder
 from jsonpath_ng.ext import parse as parse_jsonpath
-from jsonschema import FormatChecker
-from jsonschema import validators as jv_validators
-from jsonschema.exceptions import SchemaError, ValidationError
+from jsonschema.exceptions import SchemaError
 from openapi_core import OpenAPI
 from openapi_core.contrib.requests import (
     RequestsOpenAPIRequest,
@@ -32,15 +32,37 @@ from openapi_core.contrib.requests import (
 )
 from openapi_core.exceptions import OpenAPIError
 from pytz import UnknownTimeZoneError, utc
-from requests import request as client
 from requests.auth import HTTPBasicAuth, HTTPDigestAuth, HTTPProxyAuth
-from requests.exceptions import SSLError, Timeout
+from requests.exceptions import RequestException, SSLError, Timeout
 from robot.api import logger
 from robot.api.deco import keyword
 from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
 from tzlocal import get_localzone
 
+from .aggregate import EndpointSchemas
+from .codec import dumps, loads
+from .compression import DecodingRaw
+from .files import input_path
+from .history import InstanceHistory
+from .inference import infer_schema
+from .instance import Instance, to_json
+from .load import LoadRun
+from .parallel import ParallelValidator
+from .retry import hedge_delay, is_active, retry_delay
 from .schema_keywords import SCHEMA_KEYWORDS
+from .stream import parse_stream
+from .template import RequestTemplate, encode_json
+from .transport import (
+    Transport,
+    connection_protocol,
+    reused_connection,
+    tls_resumed,
+)
+from .validators import ValidatorCache, error_messages
+
+HTTP_METHODS = ("HEAD", "OPTIONS", "GET", "POST", "PUT", "PATCH", "DELETE")
+
+UTF_8 = ("utf-8", "utf8", "utf_8")
 
 
 class Keywords:
@@ -48,8 +70,18 @@ class Keywords:
     request: dict[str, Any]
     schema: dict[str, Any]
     spec: dict[str, Any]
-    instances: list[Any]
+    instances: InstanceHistory
     log_level: str
+    infer_schema: bool
+    sample_items: int
+    _transport: Transport
+    _latencies: dict[Any, deque[float]]
+    _templates: dict[str, RequestTemplate]
+    _expected: dict[str, Any] | None
+    _validators: ValidatorCache
+    _parallel: ParallelValidator | None
+    validation_errors: int
+    _endpoint_schemas: EndpointSchemas | None
 
     # Static methods defined in REST — declared here for type checking
     @staticmethod
@@ -102,6 +134,9 @@ class Keywords:
     @staticmethod
     def _input_log_level(loglevel: str) -> str: ...
 
+    @staticmethod
+    def _input_retry(value: Any, base: Any = None) -> dict[str, Any]: ...
+
     def get_keyword_names(self):
         return [
             name
@@ -182,7 +217,10 @@ class Keywords:
         | `Set Headers` | { "Accept-Encoding": "identity"} |
         | `Set Headers` | ${auth_dict} |
         """
-        self.request["headers"].update(self._input_object(headers))
+        self.request["headers"] = {
+            **self.request["headers"],
+            **self._input_object(headers),
+        }
         return self.request["headers"]
 
     @keyword(name="Expect Request", tags=("expectations",))
@@ -225,6 +263,7 @@ class Keywords:
             self.schema["properties"]["request"] = new_schema.to_schema()
         else:
             self.schema["properties"]["request"] = schema
+        self._expected = None
         return self.schema["properties"]["request"]
 
     @keyword(name="Expect Response", tags=("expectations",))
@@ -269,6 +308,7 @@ class Keywords:
             self.schema["properties"]["response"] = new_schema.to_schema()
         else:
             self.schema["properties"]["response"] = schema
+        self._expected = None
         return self.schema["properties"]["response"]
 
     @keyword(name="Expect Response Body", tags=("expectations",))
@@ -316,6 +356,7 @@ class Keywords:
             response_properties["body"].update(self._input_object(schema))
         else:
             response_properties["body"] = self._input_object(schema)
+        self._expected = None
         return response_properties["body"]
 
     @keyword(name="Clear Expectations", tags=("expectations",))
@@ -333,6 +374,7 @@ class Keywords:
             "type": "object",
             "properties": {},
         }
+        self._expected = None
         return self.schema
 
     @keyword(name="HEAD", tags=("http",))
@@ -344,6 +386,7 @@ class Keywords:
         validate=True,
         headers=None,
         loglevel=None,
+        retry=None,
     ):
         """*Sends a HEAD request to the endpoint.*
 
@@ -366,21 +409,28 @@ class Keywords:
         ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
         automatically converted to WARN (library default).
 
+        ``retry``: The number of retries, or a JSON object of the retry options
+        to override for the request. See `Retries`.
+
         *Examples*
 
         | `HEAD` | /users/1 |
         | `HEAD` | /users/1 | timeout=0.5 |
         """
         endpoint = self._input_string(endpoint)
-        request = deepcopy(self.request)
-        request["method"] = "HEAD"
+        request = self._new_request("HEAD")
         if allow_redirects is not None:
             request["allowRedirects"] = self._input_boolean(allow_redirects)
         if timeout is not None:
             request["timeout"] = self._input_timeout(timeout)
         validate = self._input_boolean(validate)
         if headers:
-            request["headers"].update(self._input_object(headers))
+            request["headers"] = {
+                **request["headers"],
+                **self._input_object(headers),
+            }
+        if retry is not None:
+            request["retry"] = self._input_retry(retry, request["retry"])
         return self._request(endpoint, request, validate, loglevel)["response"]
 
     @keyword(name="OPTIONS", tags=("http",))
@@ -392,6 +442,7 @@ class Keywords:
         validate=True,
         headers=None,
         loglevel=None,
+        retry=None,
     ):
         """*Sends an OPTIONS request to the endpoint.*
 
@@ -413,21 +464,28 @@ class Keywords:
         ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
         automatically converted to WARN (library default).
 
+        ``retry``: The number of retries, or a JSON object of the retry options
+        to override for the request. See `Retries`.
+
         *Examples*
 
         | `OPTIONS` | /users/1 |
         | `OPTIONS` | /users/1 | allow_redirects=false |
         """
         endpoint = self._input_string(endpoint)
-        request = deepcopy(self.request)
-        request["method"] = "OPTIONS"
+        request = self._new_request("OPTIONS")
         if allow_redirects is not None:
             request["allowRedirects"] = self._input_boolean(allow_redirects)
         if timeout is not None:
             request["timeout"] = self._input_timeout(timeout)
         validate = self._input_boolean(validate)
         if headers:
-            request["headers"].update(self._input_object(headers))
+            request["headers"] = {
+                **request["headers"],
+                **self._input_object(headers),
+            }
+        if retry is not None:
+            request["retry"] = self._input_retry(retry, request["retry"])
         return self._request(endpoint, request, validate, loglevel)["response"]
 
     @keyword(name="GET", tags=("http",))
@@ -441,6 +499,10 @@ class Keywords:
         headers=None,
         data=None,
         loglevel=None,
+        stream=False,
+        projection=None,
+        retry=None,
+        sample_items=None,
     ):
         """*Sends a GET request to the endpoint.*
 
@@ -467,6 +529,19 @@ class Keywords:
         ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
         automatically converted to WARN (library default).
 
+        ``stream``: If true, the response body is parsed while it is being
+        downloaded, without keeping it in memory. See `Streaming`.
+
+        ``projection``: The parts of the response body to keep when streaming,
+        as a JSONPath or a JSON array of them. Implies ``stream``.
+
+        ``retry``: The number of retries, or a JSON object of the retry options
+        to override for the request. See `Retries`.
+
+        ``sample_items``: The number of the first and the random array items
+        to infer the body schemas from, to override the library import
+        option for the request. See `The state`.
+
         *Examples*
 
         | `GET` | /users/1 |
@@ -475,12 +550,12 @@ class Keywords:
         | `GET` | /users | _limit=2 |
         | `GET` | /users | { "_limit": "2" } |
         | `GET` | https://jsonplaceholder.typicode.com/users | headers={ "Authentication": "" } |
+        | `GET` | /exports/users | projection=["$.total", "$.users[*].id"] |
 
         *Data argument is new in version 1.1.0*
         """
         endpoint = self._input_string(endpoint)
-        request = deepcopy(self.request)
-        request["method"] = "GET"
+        request = self._new_request("GET")
         request["query"] = OrderedDict()
         query_in_url = OrderedDict(parse_qsl(urlparse(endpoint).query))
         if query_in_url:
@@ -494,10 +569,20 @@ class Keywords:
             request["timeout"] = self._input_timeout(timeout)
         validate = self._input_boolean(validate)
         if headers:
-            request["headers"].update(self._input_object(headers))
+            request["headers"] = {
+                **request["headers"],
+                **self._input_object(headers),
+            }
         if data:
             request["data"] = self._input_data(data)
-        return self._request(endpoint, request, validate, loglevel)["response"]
+        projection = self._input_projection(stream, projection)
+        if retry is not None:
+            request["retry"] = self._input_retry(retry, request["retry"])
+        if sample_items is not None:
+            sample_items = self._input_integer(sample_items)
+        return self._request(
+            endpoint, request, validate, loglevel, projection, sample_items
+        )["response"]
 
     @keyword(name="POST", tags=("http",))
     def post(
@@ -510,6 +595,10 @@ class Keywords:
         headers=None,
         data=None,
         loglevel=None,
+        stream=False,
+        projection=None,
+        retry=None,
+        sample_items=None,
     ):
         """*Sends a POST request to the endpoint.*
 
@@ -535,6 +624,19 @@ class Keywords:
         ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
         automatically converted to WARN (library default).
 
+        ``stream``: If true, the response body is parsed while it is being
+        downloaded, without keeping it in memory. See `Streaming`.
+
+        ``projection``: The parts of the response body to keep when streaming,
+        as a JSONPath or a JSON array of them. Implies ``stream``.
+
+        ``retry``: The number of retries, or a JSON object of the retry options
+        to override for the request. See `Retries`.
+
+        ``sample_items``: The number of the first and the random array items
+        to infer the body schemas from, to override the library import
+        option for the request. See `The state`.
+
         *Examples*
 
         | `POST` | /users | { "id": 11, "name": "Gil Alexander" } |
@@ -543,8 +645,7 @@ class Keywords:
         *Data argument is new in version 1.1.0*
         """
         endpoint = self._input_string(endpoint)
-        request = deepcopy(self.request)
-        request["method"] = "POST"
+        request = self._new_request("POST")
         request["body"] = self.input(body)
         if allow_redirects is not None:
             request["allowRedirects"] = self._input_boolean(allow_redirects)
@@ -552,10 +653,20 @@ class Keywords:
             request["timeout"] = self._input_timeout(timeout)
         validate = self._input_boolean(validate)
         if headers:
-            request["headers"].update(self._input_object(headers))
+            request["headers"] = {
+                **request["headers"],
+                **self._input_object(headers),
+            }
         if data:
             request["data"] = self._input_data(data)
-        return self._request(endpoint, request, validate, loglevel)["response"]
+        projection = self._input_projection(stream, projection)
+        if retry is not None:
+            request["retry"] = self._input_retry(retry, request["retry"])
+        if sample_items is not None:
+            sample_items = self._input_integer(sample_items)
+        return self._request(
+            endpoint, request, validate, loglevel, projection, sample_items
+        )["response"]
 
     @keyword(name="PUT", tags=("http",))
     def put(
@@ -568,6 +679,7 @@ class Keywords:
         headers=None,
         data=None,
         loglevel=None,
+        retry=None,
     ):
         """*Sends a PUT request to the endpoint.*
 
@@ -593,6 +705,9 @@ class Keywords:
         ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
         automatically converted to WARN (library default).
 
+        ``retry``: The number of retries, or a JSON object of the retry options
+        to override for the request. See `Retries`.
+
         *Examples*
 
         | `PUT` | /users/2 | { "name": "Julie Langford", "username": "jlangfor" } |
@@ -601,8 +716,7 @@ class Keywords:
         *Data argument is new in version 1.1.0*
         """
         endpoint = self._input_string(endpoint)
-        request = deepcopy(self.request)
-        request["method"] = "PUT"
+        request = self._new_request("PUT")
         request["body"] = self.input(body)
         if allow_redirects is not None:
             request["allowRedirects"] = self._input_boolean(allow_redirects)
@@ -610,9 +724,14 @@ class Keywords:
             request["timeout"] = self._input_timeout(timeout)
         validate = self._input_boolean(validate)
         if headers:
-            request["headers"].update(self._input_object(headers))
+            request["headers"] = {
+                **request["headers"],
+                **self._input_object(headers),
+            }
         if data:
             request["data"] = self._input_data(data)
+        if retry is not None:
+            request["retry"] = self._input_retry(retry, request["retry"])
         return self._request(endpoint, request, validate, loglevel)["response"]
 
     @keyword(name="PATCH", tags=("http",))
@@ -626,6 +745,7 @@ class Keywords:
         headers=None,
         data=None,
         loglevel=None,
+        retry=None,
     ):
         """*Sends a PATCH request to the endpoint.*
 
@@ -651,6 +771,9 @@ class Keywords:
         ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
         automatically converted to WARN (library default).
 
+        ``retry``: The number of retries, or a JSON object of the retry options
+        to override for the request. See `Retries`.
+
         *Examples*
 
         | `PATCH` | /users/4 | { "name": "Clementine Bauch" } |
@@ -659,8 +782,7 @@ class Keywords:
         *Data argument is new in version 1.1.0*
         """
         endpoint = self._input_string(endpoint)
-        request = deepcopy(self.request)
-        request["method"] = "PATCH"
+        request = self._new_request("PATCH")
         request["body"] = self.input(body)
         if allow_redirects is not None:
             request["allowRedirects"] = self._input_boolean(allow_redirects)
@@ -668,9 +790,14 @@ class Keywords:
             request["timeout"] = self._input_timeout(timeout)
         validate = self._input_boolean(validate)
         if headers:
-            request["headers"].update(self._input_object(headers))
+            request["headers"] = {
+                **request["headers"],
+                **self._input_object(headers),
+            }
         if data:
             request["data"] = self._input_data(data)
+        if retry is not None:
+            request["retry"] = self._input_retry(retry, request["retry"])
         return self._request(endpoint, request, validate, loglevel)["response"]
 
     @keyword(name="DELETE", tags=("http",))
@@ -683,6 +810,7 @@ class Keywords:
         validate=True,
         headers=None,
         loglevel=None,
+        retry=None,
     ):
         """*Sends a DELETE request to the endpoint.*
 
@@ -706,6 +834,9 @@ class Keywords:
         ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
         automatically converted to WARN (library default).
 
+        ``retry``: The number of retries, or a JSON object of the retry options
+        to override for the request. See `Retries`.
+
         *Examples*
 
         | `DELETE` | /users/6 |
@@ -715,8 +846,7 @@ class Keywords:
         *Body argument is new in version 1.1.0*
         """
         endpoint = self._input_string(endpoint)
-        request = deepcopy(self.request)
-        request["method"] = "DELETE"
+        request = self._new_request("DELETE")
         request["body"] = self.input(body)
         if allow_redirects is not None:
             request["allowRedirects"] = self._input_boolean(allow_redirects)
@@ -724,9 +854,271 @@ class Keywords:
             request["timeout"] = self._input_timeout(timeout)
         validate = self._input_boolean(validate)
         if headers:
-            request["headers"].update(self._input_object(headers))
+            request["headers"] = {
+                **request["headers"],
+                **self._input_object(headers),
+            }
+        if retry is not None:
+            request["retry"] = self._input_retry(retry, request["retry"])
         return self._request(endpoint, request, validate, loglevel)["response"]
 
+    @keyword(name="Send Requests Concurrently", tags=("http",))
+    def send_requests_concurrently(
+        self, requests, max_workers=10, validate=True, loglevel=None
+    ):
+        """*Sends many requests concurrently and waits for all of them.*
+
+        ``requests``: A JSON array, a list or a path to a JSON or YAML file
+        having the requests as objects with properties:
+
+        - ``method``: The HTTP method, defaults to ``GET``
+        - ``endpoint``: Joined with the URL given on library init (if any)
+        - ``query``: Request query parameters as a JSON object
+        - ``body``: Request body as JSON
+        - ``headers``: Headers as a JSON object to add or override for the request
+        - ``timeout``: A number of seconds to wait for the response
+        - ``allow_redirects``: If false, do not follow any redirects
+        - ``data``: Data as a dictionary, bytes or a path to a file
+        - ``retry``: The retry options to override, see `Retries`
+
+        The requests are sent by a pool of at most ``max_workers`` threads,
+        sharing the connection pool of the library (see `Connections`).
+        When all the responses have been gotten, an instance is created for
+        each of them in the order the requests were given, so the last
+        instance is always for the last given request regardless of which
+        response arrived last.
+
+        *Options*
+
+        ``max_workers``: The maximum number of requests in flight at once.
+
+        ``validate``: If false, skips any request and response validations set
+        by expectation keywords and a spec given on library init.
+        Otherwise the keyword fails on the first (in the given order)
+        request or response that is not valid.
+
+        ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
+        automatically converted to WARN (library default).
+
+        *Examples*
+
+        | `Send Requests Concurrently` | ${CURDIR}/seed_users.json |
+        | `Send Requests Concurrently` | [{ "method": "POST", "endpoint": "/users", "body": { "id": 11 } }, { "endpoint": "/users/11" }] | max_workers=2 |
+        """
+        specs = self._input_array(requests)
+        max_workers = self._input_integer(max_workers)
+        if max_workers < 1:
+            raise RuntimeError(
+                "Max workers must be a positive integer: %s" % (max_workers)
+            )
+        validate = self._input_boolean(validate)
+        prepared = [self._request_from_spec(spec) for spec in specs]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._send, request) for request in prepared
+            ]
+            responses = []
+            for request, future in zip(prepared, futures):
+                response = future.result()
+                instance = self._record(request, response, validate, loglevel)
+                responses.append(instance["response"])
+        return responses
+
+    @keyword(name="Run Load", tags=("http",))
+    def run_load(
+        self,
+        request,
+        requests=None,
+        duration=None,
+        concurrency=1,
+        rate=None,
+        validate=False,
+        loglevel=None,
+    ):
+        """*Sends the same request repeatedly and summarizes the responses.*
+
+        ``request``: The request to send as a JSON object or a dictionary,
+        having the same properties as the requests for
+        `Send Requests Concurrently`.
+
+        The run stops after the given number of ``requests`` have been sent
+        or the given ``duration`` has passed, whichever comes first.
+        At least one of them must be given.
+
+        Instead of an instance per request, a single instance is created
+        for the whole run. Its response has the properties:
+
+        - ``seconds``: The wall time of the run
+        - ``requests``: The number of requests sent
+        - ``throughput``: Requests per second
+        - ``statuses``: The number of responses by status code
+        - ``errors``: The number of requests failed by error, e.g. ``Timeout``
+        - ``invalid``: The number of responses not valid against the expectations
+        - ``latency``: ``min``, ``mean``, ``p50``, ``p90``, ``p99`` and ``max`` seconds
+
+        *Options*
+
+        ``requests``: The number of requests to send.
+
+        ``duration``: The number of seconds to send requests for.
+
+        ``concurrency``: The number of requests in flight at once.
+
+        ``rate``: The target number of requests to send per second in total.
+        If not given, each of the concurrent senders sends its next request
+        as soon as it got the previous response.
+
+        ``validate``: If true, each response is validated against
+        the response expectations and the spec given on library init.
+        Invalid responses are counted to ``invalid`` instead of failing the
+        keyword. The request itself is validated once before the run.
+
+        ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
+        automatically converted to WARN (library default).
+
+        *Examples*
+
+        | `Run Load` | { "endpoint": "/users/1" } | requests=1000 | concurrency=10 |
+        | `Run Load` | { "method": "POST", "endpoint": "/users", "body": { "id": 11 } } | duration=30 | rate=50 | validate=true |
+        | `Integer` | response statuses 200 | 1000 |
+        | `Number` | response latency p99 | | maximum=0.5 |
+        """
+        template = self._request_from_spec(self._input_object(request))
+        if requests is None and duration is None:
+            raise RuntimeError(
+                "Either the number of requests or the duration must be given."
+            )
+        if requests is not None:
+            requests = self._input_integer(requests)
+        if duration is not None:
+            duration = self._input_number(duration)
+        concurrency = self._input_integer(concurrency)
+        if concurrency < 1:
+            raise RuntimeError(
+                "Concurrency must be a positive integer: %s" % (concurrency)
+            )
+        if rate is not None:
+            rate = self._input_number(rate)
+            if rate <= 0:
+                raise RuntimeError(
+                    "Rate must be a positive number: %s" % (rate)
+                )
+        validate = self._input_boolean(validate)
+        request_properties = self.schema["properties"]["request"]["properties"]
+        if validate and request_properties:
+            self._validate_schema(request_properties, template)
+        template["load"] = {
+            "requests": requests,
+            "duration": duration,
+            "concurrency": concurrency,
+            "rate": rate,
+        }
+        template["timestamp"] = self._new_timestamp()
+        content = encode_json(template["body"], template["data"])
+        run = LoadRun(requests, duration, rate)
+        run.start()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            workers = [
+                executor.submit(
+                    self._load_worker,
+                    run,
+                    template,
+                    content,
+                    validate,
+                    loglevel,
+                )
+                for _ in range(concurrency)
+            ]
+            for worker in workers:
+                worker.result()
+        run.finish()
+        response = run.summary()
+        schema = self._new_instance_schema(template)
+        if self.infer_schema:
+            request_properties = schema["properties"]["request"]["properties"]
+            request_properties["body"] = self._new_schema(template["body"])
+            request_properties["query"] = self._new_schema(template["query"])
+            schema["properties"]["response"] = self._new_schema(response)
+        self.instances.append(Instance(template, response, self.spec, schema))
+        return response
+
+    @keyword(name="Define Request Template", tags=("settings",))
+    def define_request_template(self, name, request):
+        """*Defines a named request to send repeatedly with `Send Template`.*
+
+        ``name``: The name to send the template by. Defining a template
+        with the same name again replaces it.
+
+        ``request``: The request as a JSON object or a dictionary, having
+        the same properties as the requests for `Send Requests Concurrently`.
+        The endpoint can have ``{placeholders}`` for path parameters,
+        given as ``path`` when sending the template.
+
+        The URL, query parameters and headers of the template are resolved,
+        and its body is encoded, only once when it is defined. The headers,
+        authentication and other settings of the library at that time are used.
+
+        *Examples*
+
+        | `Define Request Template` | user | { "endpoint": "/users/{id}" } |
+        | `Define Request Template` | new user | { "method": "POST", "endpoint": "/users", "body": { "name": "Gil Alexander" } } |
+        """
+        name = self._input_string(name)
+        self._templates[name] = RequestTemplate(
+            self._request_from_spec(self._input_object(request))
+        )
+        return self._templates[name].request
+
+    @keyword(name="Send Template", tags=("http",))
+    def send_template(
+        self,
+        name,
+        path=None,
+        query=None,
+        body=None,
+        headers=None,
+        validate=True,
+        loglevel=None,
+    ):
+        """*Sends a request defined with `Define Request Template`.*
+
+        ``name``: The name of the template.
+
+        *Options*
+
+        ``path``: The values for the ``{placeholders}`` in the endpoint
+        of the template as a JSON object or a dictionary.
+
+        ``query``: Request query parameters to add or override as a JSON object or a dictionary.
+
+        ``body``: Request body to send instead of the body of the template.
+
+        ``headers``: Headers as a JSON object to add or override for the request.
+
+        ``validate``: If false, skips any request and response validations set
+        by expectation keywords and a spec given on library init.
+
+        ``loglevel``: INFO, DEBUG, TRACE, WARN, ERROR, HTML. Other values are
+        automatically converted to WARN (library default).
+
+        *Examples*
+
+        | `Send Template` | user | path={ "id": 1 } |
+        | `Send Template` | new user | body={ "name": "Julie Langford" } |
+        """
+        name = self._input_string(name)
+        if name not in self._templates:
+            raise RuntimeError("No request template named: %s" % (name))
+        request, content = self._templates[name].new_request(
+            self._input_object(path) if path else None,
+            self._input_object(query) if query else None,
+            self._input_object(headers) if headers else None,
+            self.input(body) if body is not None else None,
+        )
+        validate = self._input_boolean(validate)
+        response = self._send(request, content=content)
+        return self._record(request, response, validate, loglevel)["response"]
+
     @keyword(name="Missing", tags=("assertions",))
     def missing(self, field):
         """*Asserts the field does not exist.*
@@ -1086,13 +1478,18 @@ class Keywords:
 
         Any of the following is accepted:
 
-        - The path to JSON file
+        - The path to JSON or YAML file, optionally prefixed with ``file:``
         - Any scalar that can be interpreted as JSON
         - A dictionary or a list
 
+        Files are parsed once and then read again only if they are modified.
+        Inline JSON objects, arrays and strings are never looked up as files,
+        and with the ``file:`` prefix the file must exist.
+
         *Examples*
 
         | ${payload} | `Input` | ${CURDIR}/payload.json |
+        | ${payload} | `Input` | file:${CURDIR}/payload.yaml |
 
         | ${object} | `Input` | { "name": "Julie Langford", "username": "jlangfor" } |
         | ${object} | `Input` | ${dict} |
@@ -1112,13 +1509,9 @@ class Keywords:
             return None
         if not isinstance(what, str):
             return self._input_json_from_non_string(what)
-        try:
-            is_file = Path(what).is_file()
-        except OSError:
-            # Handle cases where path is too long or invalid
-            is_file = False
-        if is_file:
-            return self._input_json_from_file(what)
+        path = input_path(what)
+        if path is not None:
+            return self._input_json_from_file(path)
         try:
             return self._input_json_as_string(what)
         except ValueError:
@@ -1194,11 +1587,7 @@ class Keywords:
 
         if file_path:
             content = dumps(
-                json,
-                ensure_ascii=False,
-                indent=4,
-                separators=(",", ": "),
-                sort_keys=sort_keys,
+                json, indent=4, sort_keys=sort_keys, default=to_json
             )
             write_mode = "a" if self._input_boolean(append) else "w"
             try:
@@ -1263,9 +1652,13 @@ class Keywords:
         if isinstance(what, (str)):
             if what == "":
                 try:
-                    json = deepcopy(self._last_instance_or_error())
-                    json.pop("schema")
-                    json.pop("spec")
+                    instance = self._last_instance_or_error()
+                    json = deepcopy(
+                        {
+                            "request": instance["request"],
+                            "response": instance["response"],
+                        }
+                    )
                 except IndexError:
                     raise RuntimeError("No instances.")
             elif what.startswith("schema"):
@@ -1296,11 +1689,7 @@ class Keywords:
         self.log_json(json, sort_keys=sort_keys, also_console=also_console)
         if file_path:
             content = dumps(
-                json,
-                ensure_ascii=False,
-                indent=4,
-                separators=(",", ": "),
-                sort_keys=sort_keys,
+                json, indent=4, sort_keys=sort_keys, default=to_json
             )
             write_mode = "a" if self._input_boolean(append) else "w"
             try:
@@ -1327,6 +1716,9 @@ class Keywords:
 
         The file is created if it does not exist, otherwise it is truncated.
 
+        If the library is imported with a ``journal``, the journal is
+        converted to the file, having each instance on a line of its own.
+
         *Options*
 
         ``sort_keys``: If true, the instances are sorted alphabetically by
@@ -1347,23 +1739,75 @@ class Keywords:
                     ".json"
                 )
         sort_keys = self._input_boolean(sort_keys)
-        content = dumps(
-            self.instances,
-            ensure_ascii=False,
-            indent=4,
-            default=vars,
-            separators=(",", ": "),
-            sort_keys=sort_keys,
-        )
+        journal = self.instances.journal
         try:
-            with open(Path(file_path), "w", encoding="utf-8") as file:
-                file.write(content)
+            if journal is not None:
+                with open(Path(file_path), "w", encoding="utf-8") as file:
+                    journal.export(file, self.instances[-1:], sort_keys)
+            else:
+                content = dumps(
+                    self.instances,
+                    indent=4,
+                    sort_keys=sort_keys,
+                    default=to_json,
+                )
+                with open(Path(file_path), "w", encoding="utf-8") as file:
+                    file.write(content)
         except OSError as e:
             raise RuntimeError(
                 "Error exporting instances " + f"to file '{file_path}':\n{e}"
             )
         return self.instances
 
+    @keyword(name="Output Endpoint Schemas", tags=("I/O",))
+    def output_endpoint_schemas(
+        self, file_path=None, sort_keys=False, also_console=True
+    ):
+        """*Outputs the schemas merged per endpoint to terminal or a file.*
+
+        Requires importing the library with ``aggregate_schemas=true``.
+        The schemas of all the requests and responses so far are merged per
+        the HTTP method and the path, in which numbers, UUIDs and long
+        hexadecimal identifiers are replaced with ``{id}``. For each such
+        endpoint, the output has the number of ``requests``, the schemas for
+        the ``request`` query and body, and for the response body per status
+        in ``responses``. These are a starting point for writing the schemas
+        for `Expect Response Body` or a spec.
+
+        *Options*
+
+        ``file_path``: The JSON file to write to. It is created if it does not
+        exist, otherwise it is truncated.
+
+        ``sort_keys``: If true, the schemas are sorted alphabetically by
+        property names.
+
+        ``also_console``: If false, the schemas are not written to terminal.
+
+        *Examples*
+
+        | `Output Endpoint Schemas` | ${OUTPUTDIR}/endpoints.json | also_console=false |
+        """
+        if self._endpoint_schemas is None:
+            raise RuntimeError(
+                "Endpoint schemas are not merged, "
+                + "import the library with aggregate_schemas=true."
+            )
+        json = self._endpoint_schemas.to_json()
+        sort_keys = self._input_boolean(sort_keys)
+        also_console = self._input_boolean(also_console)
+        self.log_json(json, sort_keys=sort_keys, also_console=also_console)
+        if file_path:
+            content = dumps(json, indent=4, sort_keys=sort_keys)
+            try:
+                with open(Path(file_path), "w", encoding="utf-8") as file:
+                    file.write(content)
+            except OSError as e:
+                raise RuntimeError(
+                    f"Error outputting to file '{file_path}':\n{e}"
+                )
+        return json
+
     @keyword(name="Set SSL Verify", tags=("settings",))
     def set_ssl_verify(self, ssl_verify=True):
         """*Sets new SSL verify option*
@@ -1403,7 +1847,29 @@ class Keywords:
             self.auth = auth_type(user, password)
         return self.auth
 
-    def _request(self, endpoint, request, validate=True, log_level=None):
+    def _request(
+        self,
+        endpoint,
+        request,
+        validate=True,
+        log_level=None,
+        projection=None,
+        sample_items=None,
+    ):
+        self._prepare(endpoint, request)
+        response = self._send(request, stream=projection is not None)
+        return self._record(
+            request, response, validate, log_level, projection, sample_items
+        )
+
+    def _new_request(self, method):
+        # The values of the library request are replaced, never modified,
+        # so the requests can share them until overriding one
+        request = dict(self.request)
+        request["method"] = method
+        return request
+
+    def _prepare(self, endpoint, request):
         if not endpoint.startswith(("http://", "https://")):
             base_url = self.request["scheme"] + "://" + self.request["netloc"]
             if not endpoint.startswith("/"):
@@ -1415,21 +1881,11 @@ class Keywords:
         request["netloc"] = url_parts.netloc
         request["path"] = url_parts.path
         request["auth"] = self.auth
+        return request
+
+    def _send(self, request, stream=False, content=None):
         try:
-            response = client(
-                request["method"],
-                request["url"],
-                params=request["query"],
-                json=request["body"],
-                data=request["data"],
-                headers=request["headers"],
-                proxies=request["proxies"],
-                cert=request["cert"],
-                auth=request["auth"],
-                timeout=tuple(request["timeout"]),
-                allow_redirects=request["allowRedirects"],
-                verify=request["sslVerify"],
-            )
+            response = self._send_attempts(request, stream, content)
         except SSLError as e:
             raise AssertionError(
                 "%s to %s SSL certificate verify failed:\n%s"
@@ -1440,29 +1896,271 @@ class Keywords:
                 "%s to %s timed out:\n%s"
                 % (request["method"], request["url"], e)
             )
+        request["timestamp"] = self._new_timestamp()
+        return response
+
+    def _send_attempts(self, request, stream, content=None):
+        policy = request.get("retry")
+        if not is_active(policy):
+            return self._transport.send(request, stream, content)
+        key = (request["method"], request["url"])
+        attempts = []
+        retried = 0
+        while True:
+            latencies = self._latencies.setdefault(key, deque(maxlen=100))
+            hedge = hedge_delay(policy, request["method"], latencies)
+            response = error = None
+            try:
+                if hedge is None:
+                    attempts.append(self._new_attempt())
+                    response = self._send_attempt(
+                        request, stream, content, attempts[-1]
+                    )
+                else:
+                    response = self._send_hedged(
+                        request, stream, content, hedge, attempts
+                    )
+            except RequestException as e:
+                error = e
+            delay = retry_delay(
+                policy, retried, request["method"], response, error
+            )
+            if delay is None:
+                break
+            attempts[-1]["delay"] = delay
+            if response is not None:
+                response.close()
+            sleep(delay)
+            retried += 1
+        if error is not None:
+            raise error
+        # Hedges still running may update their attempts later
+        response.attempts = [dict(attempt) for attempt in attempts]
+        return response
+
+    @staticmethod
+    def _new_attempt(hedge=False):
+        return {
+            "status": None,
+            "error": None,
+            "seconds": None,
+            "delay": None,
+            "hedge": hedge,
+        }
+
+    def _send_attempt(self, request, stream, content, attempt):
+        started = perf_counter()
+        try:
+            response = self._transport.send(request, stream, content)
+        except RequestException as e:
+            attempt["error"] = type(e).__name__
+            attempt["seconds"] = perf_counter() - started
+            raise
+        attempt["status"] = response.status_code
+        attempt["seconds"] = perf_counter() - started
+        self._latencies[(request["method"], request["url"])].append(
+            attempt["seconds"]
+        )
+        return response
+
+    def _send_hedged(self, request, stream, content, hedge, attempts):
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            attempts.append(self._new_attempt())
+            futures = [
+                executor.submit(
+                    self._send_attempt,
+                    request,
+                    stream,
+                    content,
+                    attempts[-1],
+                )
+            ]
+            done, _ = wait(futures, timeout=hedge)
+            if not done:
+                attempts.append(self._new_attempt(hedge=True))
+                futures.append(
+                    executor.submit(
+                        self._send_attempt,
+                        request,
+                        stream,
+                        content,
+                        attempts[-1],
+                    )
+                )
+            for future in as_completed(futures):
+                if future.exception() is None or len(futures) == 1:
+                    break
+                futures.remove(future)
+        finally:
+            executor.shutdown(wait=False)
+        for other in futures:
+            if other is not future:
+                other.add_done_callback(self._close_response)
+        return future.result()
+
+    @staticmethod
+    def _close_response(future):
+        if future.exception() is None:
+            future.result().close()
+
+    def _new_timestamp(self):
         utc_datetime = datetime.now(tz=utc)
-        request["timestamp"] = {}
-        request["timestamp"]["utc"] = utc_datetime.isoformat()
+        timestamp = {}
+        timestamp["utc"] = utc_datetime.isoformat()
         try:
-            request["timestamp"]["local"] = utc_datetime.astimezone(
+            timestamp["local"] = utc_datetime.astimezone(
                 get_localzone()
             ).isoformat()
         except UnknownTimeZoneError as e:
             logger.info("Cannot infer local timestamp! tzlocal:%s" % str(e))
+        return timestamp
+
+    def _record(
+        self,
+        request,
+        response,
+        validate=True,
+        log_level=None,
+        projection=None,
+        sample_items=None,
+    ):
+        started = perf_counter_ns()
         if validate and self.spec:
             self._assert_spec(self.spec, response)
-        instance = self._instantiate(request, response, validate, log_level)
+        validated = perf_counter_ns() - started
+        instance = self._instantiate(
+            request, response, validate, log_level, projection, sample_items
+        )
+        instance["response"]["timings"]["validation"] += validated / 1e9
+        if self._endpoint_schemas is not None:
+            self._endpoint_schemas.add(request, instance["response"])
         self.instances.append(instance)
         return instance
 
+    def _request_from_spec(self, spec):
+        if not isinstance(spec, dict):
+            raise RuntimeError("Request spec is not a JSON object: %s" % (spec))
+        method = self._input_string(spec.get("method", "GET")).upper()
+        if method not in HTTP_METHODS:
+            raise RuntimeError(
+                "Request spec has unknown HTTP method: %s" % (method)
+            )
+        if "endpoint" not in spec:
+            raise RuntimeError("Request spec has no endpoint: %s" % (spec))
+        endpoint = self._input_string(spec["endpoint"])
+        request = self._new_request(method)
+        request["query"] = OrderedDict()
+        query_in_url = OrderedDict(parse_qsl(urlparse(endpoint).query))
+        if query_in_url:
+            request["query"].update(query_in_url)
+            endpoint = endpoint.rsplit("?", 1)[0]
+        if spec.get("query"):
+            request["query"].update(self._input_object(spec["query"]))
+        request["body"] = self.input(spec.get("body"))
+        if spec.get("allow_redirects") is not None:
+            request["allowRedirects"] = self._input_boolean(
+                spec["allow_redirects"]
+            )
+        if spec.get("timeout") is not None:
+            request["timeout"] = self._input_timeout(spec["timeout"])
+        if spec.get("headers"):
+            request["headers"] = {
+                **request["headers"],
+                **self._input_object(spec["headers"]),
+            }
+        if spec.get("data"):
+            request["data"] = self._input_data(spec["data"])
+        if spec.get("retry") is not None:
+            request["retry"] = self._input_retry(
+                spec["retry"], request["retry"]
+            )
+        return self._prepare(endpoint, request)
+
+    def _load_worker(self, run, template, content, validate, log_level):
+        response_properties = self.schema["properties"]["response"][
+            "properties"
+        ]
+        while True:
+            slot = run.next_slot()
+            if slot is None:
+                return
+            delay = slot - perf_counter()
+            if delay > 0:
+                sleep(delay)
+            started = perf_counter()
+            try:
+                response = self._send(dict(template), content=content)
+            except (AssertionError, RequestException) as e:
+                run.record(error=type(e.__context__ or e).__name__)
+                continue
+            latency = perf_counter() - started
+            valid = True
+            if validate:
+                try:
+                    if self.spec:
+                        self._assert_spec(self.spec, response)
+                    if response_properties:
+                        self._validate_schema(
+                            response_properties,
+                            self._new_response(response, log_level),
+                        )
+                except AssertionError:
+                    valid = False
+            run.record(latency, response.status_code, valid=valid)
+
     def _instantiate(
-        self, request, response, validate_schema=True, log_level=None
+        self,
+        request,
+        response,
+        validate_schema=True,
+        log_level=None,
+        projection=None,
+        sample_items=None,
     ):
+        response = self._new_response(response, log_level, projection)
+        timings = response["timings"]
+        expected = self._expected_schema()
+        request_properties = expected["properties"]["request"]["properties"]
+        response_properties = expected["properties"]["response"]["properties"]
+        started = perf_counter_ns()
+        if validate_schema:
+            if request_properties:
+                self._validate_schema(request_properties, request)
+            if response_properties:
+                self._validate_schema(response_properties, response)
+        timings["validation"] = (perf_counter_ns() - started) / 1e9
+        timings["inference"] = 0.0
+        return Instance(
+            request,
+            response,
+            self.spec,
+            new_schema=partial(
+                self._new_inferred_schema,
+                request,
+                response,
+                expected,
+                self._schema_description(),
+                sample_items,
+            ),
+        )
+
+    def _new_response(self, response, log_level=None, projection=None):
+        timings = dict(getattr(response, "timings", {}))
+        started = perf_counter_ns()
+        summary = None
         try:
-            response_body = response.json()
+            if projection is not None:
+                response_body, summary = self._parse_stream(
+                    response, projection
+                )
+            elif (response.encoding or "utf-8").lower() in UTF_8:
+                response_body = loads(response.content)
+            else:
+                response_body = response.json()
         except ValueError:
-            response_body = response.text
-            if response_body:
+            response_body = None if projection is not None else response.text
+            if response_body or projection is not None:
                 if not log_level:
                     log_level = self.log_level
                 try:
@@ -1479,40 +2177,89 @@ class Keywords:
                         log_level,
                     ),
                 )
-        response = {
-            "seconds": response.elapsed.microseconds / 1000 / 1000,
+        timings["decode"] = (perf_counter_ns() - started) / 1e9
+        json_response = {
+            "seconds": response.elapsed.total_seconds(),
             "status": response.status_code,
             "reason": response.reason,
             "body": response_body,
             "headers": dict(response.headers),
+            "connection": {
+                "reused": reused_connection(response),
+                "protocol": connection_protocol(response),
+                "tlsResumed": tls_resumed(response),
+            },
+            "timings": timings,
         }
-        schema = deepcopy(self.schema)
-        schema["title"] = "{} {}".format(request["method"], request["url"])
+        if summary is not None:
+            json_response["stream"] = summary
+        if isinstance(response.raw, DecodingRaw):
+            json_response["compression"] = response.raw.compression
+        if hasattr(response, "attempts"):
+            json_response["attempts"] = response.attempts
+        return json_response
+
+    def _parse_stream(self, response, projection):
+        if response._content is False:
+            try:
+                return parse_stream(response.raw, projection)
+            finally:
+                response.raw.drain_conn()
+                response.raw.release_conn()
+        # The body was already read, e.g. for validating against the spec
+        return parse_stream(BytesIO(response.content), projection)
+
+    def _input_projection(self, stream, projection):
+        if projection is None:
+            return [] if self._input_boolean(stream) else None
+        if isinstance(projection, str) and projection.startswith("$"):
+            return [projection]
+        return self._input_array(projection)
+
+    def _expected_schema(self):
+        # Shared by the instances until the expectations change
+        if self._expected is None:
+            self._expected = deepcopy(self.schema)
+        return self._expected
+
+    def _schema_description(self):
         try:
-            schema["description"] = "{}: {}".format(
+            return "{}: {}".format(
                 BuiltIn().get_variable_value("${SUITE NAME}"),
                 BuiltIn().get_variable_value("${TEST NAME}"),
             )
         except RobotNotRunningError:
-            schema["description"] = ""
-        request_properties = schema["properties"]["request"]["properties"]
-        response_properties = schema["properties"]["response"]["properties"]
-        if validate_schema:
-            if request_properties:
-                self._validate_schema(request_properties, request)
-            if response_properties:
-                self._validate_schema(response_properties, response)
-        request_properties["body"] = self._new_schema(request["body"])
-        request_properties["query"] = self._new_schema(request["query"])
-        response_properties["body"] = self._new_schema(response["body"])
+            return ""
+
+    def _new_instance_schema(self, request, expected=None, description=None):
+        schema = deepcopy(self.schema if expected is None else expected)
+        schema["title"] = "{} {}".format(request["method"], request["url"])
+        if description is None:
+            description = self._schema_description()
+        schema["description"] = description
+        return schema
+
+    def _new_inferred_schema(
+        self, request, response, expected, description, sample_items=None
+    ):
+        schema = self._new_instance_schema(request, expected, description)
+        if self.infer_schema:
+            started = perf_counter_ns()
+            request_properties = schema["properties"]["request"]["properties"]
+            response_properties = schema["properties"]["response"]["properties"]
+            request_properties["body"] = self._new_schema(
+                request["body"], sample_items
+            )
+            request_properties["query"] = self._new_schema(request["query"])
+            response_properties["body"] = self._new_schema(
+                response["body"], sample_items
+            )
+            response["timings"]["inference"] += (
+                perf_counter_ns() - started
+            ) / 1e9
         if "default" in schema and schema["default"]:
             self._add_defaults_to_schema(schema, response)
-        return {
-            "request": request,
-            "response": response,
-            "schema": schema,
-            "spec": self.spec,
-        }
+        return schema
 
     def _assert_spec(self, spec, response):
         request = response.request
@@ -1544,31 +2291,29 @@ class Keywords:
             self._assert_schema(schema[field], json_dict[field])
 
     def _assert_schema(self, schema, reality):
+        top_schema = getattr(self, "schema", None)
         try:
-            top_schema = getattr(self, "schema", None)
-            if (
-                top_schema
-                and isinstance(top_schema, dict)
-                and "$schema" in top_schema
-            ):
-                validator_cls = jv_validators.validator_for(top_schema)
+            if self._parallel:
+                messages = self._parallel.errors(schema, reality, top_schema)
             else:
-                validator_cls = jv_validators.validator_for(schema)
-            validator = validator_cls(schema, format_checker=FormatChecker())
-            validator.validate(reality)
+                messages = error_messages(
+                    self._validators.get(schema, top_schema),
+                    reality,
+                    self.validation_errors,
+                )
         except SchemaError as e:
             raise RuntimeError(e)
-        except ValidationError as e:
-            raise AssertionError(e)
+        if messages:
+            raise AssertionError("\n\n".join(messages))
 
-    def _new_schema(self, value):
-        builder = SchemaBuilder(schema_uri=False)  # type: ignore[arg-type]
-        builder.add_object(value)
-        return builder.to_schema()
+    def _new_schema(self, value, sample_items=None):
+        if sample_items is None:
+            sample_items = self.sample_items
+        return infer_schema(value, sample_items)
 
     def _add_defaults_to_schema(self, schema, response):
         body = response["body"]
-        schema = schema["properties"]["response"]["properties"]["body"]
+        schema = schema["properties"]["response"]["properties"].get("body", {})
         if isinstance(body, (dict)) and "properties" in schema:
             self._add_property_defaults(body, schema["properties"])
 
@@ -1589,7 +2334,7 @@ class Keywords:
             value = last_instance["response"]["body"]
             if return_schema:
                 schema = last_instance["schema"]["properties"]["response"]
-                schema = schema["properties"]["body"]
+                schema = self._schema_by_key(schema, "body", value)
             if field == "$":
                 return [
                     {
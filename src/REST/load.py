@@ -0,0 +1,84 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+from collections import Counter
+from math import ceil
+from threading import Lock
+from time import perf_counter
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(ordered, p):
+    # Nearest-rank percentile of an already sorted, non-empty list
+    return ordered[max(0, ceil(p / 100 * len(ordered)) - 1)]
+
+
+class LoadRun:
+    def __init__(self, count=None, duration=None, rate=None):
+        self.count = count
+        self.duration = duration
+        self.rate = rate
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.invalid = 0
+        self.started = 0.0
+        self.finished = 0.0
+        self._scheduled = 0
+        self._lock = Lock()
+
+    def start(self):
+        self.started = perf_counter()
+
+    def next_slot(self):
+        """Returns when to send the next request, or None if the run is over."""
+        with self._lock:
+            if self.count is not None and self._scheduled >= self.count:
+                return None
+            if self.rate:
+                slot = self.started + self._scheduled / self.rate
+            else:
+                slot = perf_counter()
+            if self.duration is not None:
+                if slot - self.started >= self.duration:
+                    return None
+            self._scheduled += 1
+            return slot
+
+    def record(self, latency=None, status=None, error=None, valid=True):
+        with self._lock:
+            if error:
+                self.errors[error] += 1
+                return
+            self.latencies.append(latency)
+            self.statuses[str(status)] += 1
+            if not valid:
+                self.invalid += 1
+
+    def finish(self):
+        self.finished = perf_counter()
+
+    def summary(self):
+        seconds = self.finished - self.started
+        sent = len(self.latencies) + sum(self.errors.values())
+        latency = {}
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            latency["min"] = ordered[0]
+            latency["mean"] = sum(ordered) / len(ordered)
+            for p in PERCENTILES:
+                latency["p%s" % (p)] = percentile(ordered, p)
+            latency["max"] = ordered[-1]
+        return {
+            "seconds": seconds,
+            "requests": sent,
+            "throughput": sent / seconds if seconds else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+            "errors": dict(sorted(self.errors.items())),
+            "invalid": self.invalid,
+            "latency": latency,
+        }
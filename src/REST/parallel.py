@@ -0,0 +1,244 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from multiprocessing import get_all_start_methods, get_context
+from tempfile import TemporaryDirectory
+from threading import Lock
+
+from .codec import dumps
+from .validators import (
+    FORMAT_CHECKER,
+    MAX_VALIDATORS,
+    CompiledValidator,
+    compile_validator,
+    error_messages,
+)
+
+# Arrays having fewer items are validated in the library process
+MIN_ITEMS = 10000
+
+# Chunks per worker, so that the workers finishing early are given more
+CHUNKS_PER_WORKER = 4
+
+# Keywords of an array that depend on what its items schema validates
+ITEMS_KEYWORDS = ("prefixItems", "additionalItems", "unevaluatedItems")
+
+REF_KEYWORDS = ("$ref", "$dynamicRef", "$recursiveRef")
+
+
+def _pool_context():
+    # Forking the library process is not safe with its threads running,
+    # so the workers are forked from a server having this module imported
+    if "forkserver" not in get_all_start_methods():
+        return get_context("spawn")
+    context = get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class ParallelValidator:
+    """Validates the items of large arrays in a pool of worker processes.
+
+    The arrays are the value itself, or in its properties at any depth.
+    They are split into chunks, validated by the workers against the items
+    schema, while the rest of the schema is validated in the library process
+    as before. The pool is started on the first large array, and is kept
+    until ``close``.
+
+    Each items schema is shipped to the workers once, as a file named by
+    its key in a directory of the pool. The tasks only have the key of
+    the schema, and each worker reads the file the first time it sees it.
+
+    The messages of the first ``max_errors`` errors are returned, the same
+    as ``error_messages`` returns for the whole schema. If the rest of
+    the schema is not valid, its errors may come before those of the items,
+    so then the whole schema is validated in the library process.
+    """
+
+    def __init__(self, validators, workers, max_errors=1, min_items=MIN_ITEMS):
+        self.validators = validators
+        self.workers = workers
+        self.max_errors = max_errors
+        self.min_items = min_items
+        self.executor = None
+        self.directory = None
+        self.shipped = set()
+        self.lock = Lock()
+
+    def errors(self, schema, reality, top_schema=None):
+        arrays = []
+        rest = schema
+        if not _has_refs(schema):
+            rest = _split(schema, reality, self.min_items, (), (), arrays)
+        validator = self.validators.get(rest, top_schema)
+        if not arrays:
+            return error_messages(validator, reality, self.max_errors)
+        if not validator.is_valid(reality):
+            validator = self.validators.get(schema, top_schema)
+            return error_messages(validator, reality, self.max_errors)
+        if isinstance(validator, CompiledValidator):
+            validator = validator.validator
+        return self._validate_items(type(validator), arrays)
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+                self.directory.cleanup()
+            self.executor = None
+            self.directory = None
+            self.shipped.clear()
+
+    def _pool(self):
+        with self.lock:
+            if self.executor is None:
+                self.directory = TemporaryDirectory(prefix="restinstance-")
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=_pool_context(),
+                    initializer=_start_worker,
+                    initargs=(self.directory.name, self.validators.compiled),
+                )
+            return self.executor, self.directory.name
+
+    def _ship(self, directory, validator_cls, schema):
+        """Returns the key of the items schema, writing it for the workers."""
+        content = validator_cls.__name__ + dumps(schema, sort_keys=True)
+        key = sha256(content.encode("utf-8")).hexdigest()
+        with self.lock:
+            if key not in self.shipped:
+                path = os.path.join(directory, key)
+                with open(path + ".tmp", "wb") as file:
+                    pickle.dump((validator_cls, schema), file)
+                # The workers read the whole file or do not find it
+                os.replace(path + ".tmp", path)
+                self.shipped.add(key)
+        return key
+
+    def _validate_items(self, validator_cls, arrays):
+        executor, directory = self._pool()
+        tasks = []
+        for path, schema_path, schema, items in arrays:
+            key = self._ship(directory, validator_cls, schema)
+            size = max(
+                len(items) // (self.workers * CHUNKS_PER_WORKER),
+                self.min_items // CHUNKS_PER_WORKER,
+                1,
+            )
+            for offset in range(0, len(items), size):
+                tasks.append(
+                    (
+                        key,
+                        path,
+                        schema_path,
+                        offset,
+                        items[offset : offset + size],
+                        self.max_errors,
+                    )
+                )
+        futures = [executor.submit(_validate_chunk, *task) for task in tasks]
+        messages = []
+        for future in futures:
+            messages.extend(future.result())
+            if len(messages) >= self.max_errors:
+                for pending in futures:
+                    pending.cancel()
+                break
+        return messages[: self.max_errors]
+
+
+def _has_refs(schema):
+    if isinstance(schema, dict):
+        return any(
+            keyword in REF_KEYWORDS or _has_refs(value)
+            for keyword, value in schema.items()
+        )
+    if isinstance(schema, list):
+        return any(_has_refs(value) for value in schema)
+    return False
+
+
+def _split(schema, value, min_items, path, schema_path, arrays):
+    """Returns ``schema`` without the items schemas of the large arrays.
+
+    The arrays are appended to ``arrays`` with their path in ``value``,
+    the path of their items schema in ``schema``, and the items schema.
+    """
+    if not isinstance(schema, dict):
+        return schema
+    if isinstance(value, list):
+        if (
+            len(value) >= min_items
+            and isinstance(schema.get("items"), dict)
+            and not any(keyword in schema for keyword in ITEMS_KEYWORDS)
+        ):
+            arrays.append(
+                (path, schema_path + ("items",), schema["items"], value)
+            )
+            return {
+                keyword: subschema
+                for keyword, subschema in schema.items()
+                if keyword != "items"
+            }
+    elif isinstance(value, dict) and isinstance(schema.get("properties"), dict):
+        found = len(arrays)
+        properties = {
+            key: _split(
+                subschema,
+                value[key],
+                min_items,
+                path + (key,),
+                schema_path + ("properties", key),
+                arrays,
+            )
+            if key in value
+            else subschema
+            for key, subschema in schema["properties"].items()
+        }
+        if len(arrays) > found:
+            return dict(schema, properties=properties)
+    return schema
+
+
+_worker = {}
+
+
+def _start_worker(directory, compiled):
+    _worker["directory"] = directory
+    _worker["compiled"] = compiled
+    _worker["validators"] = {}
+
+
+def _validator(key):
+    validators = _worker["validators"]
+    validator = validators.get(key)
+    if validator is None:
+        with open(os.path.join(_worker["directory"], key), "rb") as file:
+            validator_cls, schema = pickle.load(file)
+        validator = validator_cls(schema, format_checker=FORMAT_CHECKER)
+        if _worker["compiled"]:
+            validator = compile_validator(validator)
+        if len(validators) >= MAX_VALIDATORS:
+            del validators[next(iter(validators))]
+        validators[key] = validator
+    return validator
+
+
+def _validate_chunk(key, path, schema_path, offset, items, max_errors):
+    validator = _validator(key)
+    messages = []
+    for index, item in enumerate(items, offset):
+        for error in validator.iter_errors(item):
+            error.path.extendleft(reversed(path + (index,)))
+            error.schema_path.extendleft(reversed(schema_path))
+            messages.append(str(error))
+            if len(messages) >= max_errors:
+                return messages
+    return messages
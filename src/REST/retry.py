@@ -0,0 +1,139 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from random import uniform
+
+from requests.exceptions import (
+    ChunkedEncodingError,
+    ConnectionError,
+    SSLError,
+    Timeout,
+)
+
+from .load import percentile
+
+IDEMPOTENT_METHODS = ("HEAD", "OPTIONS", "GET", "PUT", "DELETE")
+
+DEFAULT_POLICY = {
+    "retries": 0,
+    "statuses": [429, 502, 503, 504],
+    "backoff": 0.1,
+    "maxDelay": 10,
+    "jitter": True,
+    "retryAfter": True,
+    "idempotentOnly": True,
+    "hedge": None,
+}
+
+# Latencies needed before hedging after a percentile of them
+HEDGE_MIN_SAMPLES = 10
+
+HEDGE_PERCENTILE = re.compile(r"^p(\d{1,2}(\.\d+)?)$")
+
+
+def new_policy(value, base=None):
+    """Returns ``base`` (or the defaults) updated with the JSON object ``value``.
+
+    An integer ``value`` is a shorthand for the number of retries.
+    """
+    policy = dict(base or DEFAULT_POLICY)
+    if isinstance(value, int) and not isinstance(value, bool):
+        value = {"retries": value}
+    for key in value:
+        if key not in DEFAULT_POLICY:
+            raise RuntimeError(
+                "Unknown retry option '%s', must be one of: %s"
+                % (key, ", ".join(DEFAULT_POLICY))
+            )
+    policy.update(value)
+    for key in ("retries", "backoff", "maxDelay"):
+        if not isinstance(policy[key], (int, float)) or policy[key] < 0:
+            raise RuntimeError(
+                "Retry option '%s' is not a non-negative number: %s"
+                % (key, policy[key])
+            )
+    if not all(isinstance(status, int) for status in policy["statuses"]):
+        raise RuntimeError(
+            "Retry option 'statuses' is not an array of integers: %s"
+            % (policy["statuses"])
+        )
+    hedge = policy["hedge"]
+    if hedge is not None and not (
+        isinstance(hedge, (int, float)) or HEDGE_PERCENTILE.match(str(hedge))
+    ):
+        raise RuntimeError(
+            "Retry option 'hedge' is not seconds "
+            + "or a percentile like 'p95': %s" % (hedge)
+        )
+    return policy
+
+
+def is_active(policy):
+    return bool(policy and (policy["retries"] or policy["hedge"] is not None))
+
+
+def allows(policy, method):
+    return method in IDEMPOTENT_METHODS or not policy["idempotentOnly"]
+
+
+def retry_delay(policy, retried, method, response=None, error=None):
+    """Returns the seconds to wait before retrying, or None if not retried.
+
+    ``retried`` is the number of retries done so far.
+    """
+    if retried >= policy["retries"] or not allows(policy, method):
+        return None
+    if error is not None:
+        retriable = isinstance(
+            error, (ConnectionError, Timeout, ChunkedEncodingError)
+        )
+        if not retriable or isinstance(error, SSLError):
+            return None
+    elif response.status_code not in policy["statuses"]:
+        return None
+    if response is not None and policy["retryAfter"]:
+        retry_after = _retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return min(retry_after, policy["maxDelay"])
+    delay = min(policy["backoff"] * 2**retried, policy["maxDelay"])
+    if policy["jitter"]:
+        delay = uniform(0, delay)
+    return delay
+
+
+def hedge_delay(policy, method, latencies):
+    """Returns the seconds to wait before hedging, or None if not hedged.
+
+    ``latencies`` are the previous latencies of the same request.
+    """
+    hedge = policy["hedge"]
+    if hedge is None or not allows(policy, method):
+        return None
+    if isinstance(hedge, (int, float)):
+        return hedge
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return None
+    p = float(HEDGE_PERCENTILE.match(hedge).group(1))  # type: ignore[union-attr]
+    return percentile(sorted(latencies), p)
+
+
+def _retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
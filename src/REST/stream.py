@@ -0,0 +1,180 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import re
+
+PROJECTION_TOKEN = re.compile(
+    r"\.(?P<key>[^.\[\]]+)|\[\*\]|\['(?P<single>[^']+)'\]|\[\"(?P<double>[^\"]+)\"\]"
+)
+
+VALUE_EVENTS = {
+    "start_map": "object",
+    "start_array": "array",
+    "string": "string",
+    "boolean": "boolean",
+    "null": "null",
+}
+
+
+def projection_prefix(path):
+    """Converts a JSONPath having only keys and ``[*]`` to an ijson prefix."""
+    if not path.startswith("$"):
+        raise RuntimeError("Projection is not a JSONPath: %s" % (path))
+    parts = []
+    position = 1
+    while position < len(path):
+        match = PROJECTION_TOKEN.match(path, position)
+        if not match:
+            raise RuntimeError(
+                "Projection can only have properties and [*]: %s" % (path)
+            )
+        key = match.group("key") or match.group("single")
+        key = key or match.group("double")
+        parts.append(key if key else "item")
+        position = match.end()
+    return ".".join(parts)
+
+
+class _CountingReader:
+    def __init__(self, reader):
+        self.reader = reader
+        self.bytes = 0
+
+    def read(self, size=-1):
+        chunk = self.reader.read(size)
+        self.bytes += len(chunk)
+        return chunk
+
+
+class _Shape:
+    # Infers the schema from the parser events without keeping the values
+    def __init__(self):
+        self.types = {}
+        self.keys = {}
+
+    def add(self, prefix, event, value):
+        if event == "map_key":
+            keys = self.keys.setdefault(prefix, {})
+            keys[value] = None
+            return
+        if event == "number":
+            json_type = "integer" if isinstance(value, int) else "number"
+        else:
+            json_type = VALUE_EVENTS.get(event)
+        if json_type:
+            self.types.setdefault(prefix, set()).add(json_type)
+
+    def to_schema(self, prefix=""):
+        types = self.types.get(prefix, set())
+        if "integer" in types and "number" in types:
+            types = types - {"integer"}
+        schema = {}
+        if types:
+            ordered = sorted(types)
+            schema["type"] = ordered[0] if len(ordered) == 1 else ordered
+        if "object" in types:
+            schema["properties"] = {
+                key: self.to_schema(self._child(prefix, key))
+                for key in self.keys.get(prefix, {})
+            }
+        if "array" in types and self._child(prefix, "item") in self.types:
+            schema["items"] = self.to_schema(self._child(prefix, "item"))
+        return schema
+
+    @staticmethod
+    def _child(prefix, key):
+        return "%s.%s" % (prefix, key) if prefix else key
+
+
+def _set_in(document, path, value):
+    if not path:
+        return value
+    if document is None:
+        document = [] if isinstance(path[0], int) else {}
+    container = document
+    for key, next_key in zip(path, path[1:]):
+        empty = [] if isinstance(next_key, int) else {}
+        container = _child_in(container, key, empty)
+    _child_in(container, path[-1], value, replace=True)
+    return document
+
+
+def _child_in(container, key, default, replace=False):
+    if isinstance(key, int):
+        while len(container) <= key:
+            container.append(None)
+        if replace or container[key] is None:
+            container[key] = default
+    elif replace or key not in container:
+        container[key] = default
+    return container[key]
+
+
+def parse_stream(reader, projection=()):
+    """Parses JSON from the file-like ``reader`` without materializing it.
+
+    Returns the body having only the projected subtrees, and a summary
+    having the size in bytes, the number of root items (or properties)
+    and the inferred shape of the whole body.
+    """
+    try:
+        import ijson
+    except ImportError:
+        raise RuntimeError(
+            "Streaming responses requires ijson, "
+            + "install it with: pip install RESTinstance[stream]"
+        )
+    prefixes = {projection_prefix(path) for path in projection}
+    counting = _CountingReader(reader)
+    try:
+        body, items, shape = _walk(ijson, counting, prefixes)
+    except ijson.JSONError as e:
+        raise ValueError("Response body is not valid JSON: %s" % (e))
+    summary = {
+        "bytes": counting.bytes,
+        "items": items,
+        "shape": shape.to_schema(),
+    }
+    return body, summary
+
+
+def _walk(ijson, reader, prefixes):
+    shape = _Shape()
+    body = None
+    items = 0
+    # Each entry is [path, is array, next index or the current key]
+    stack = []
+    builder = None
+    for prefix, event, value in ijson.parse(reader, use_float=True):
+        shape.add(prefix, event, value)
+        if event == "map_key":
+            stack[-1][2] = value
+            if len(stack) == 1:
+                items += 1
+        elif event in ("end_map", "end_array"):
+            stack.pop()
+        else:
+            path = []
+            if stack:
+                parent_path, is_array, slot = stack[-1]
+                path = parent_path + [slot]
+                if is_array:
+                    stack[-1][2] += 1
+                    if len(stack) == 1:
+                        items += 1
+            if builder is None and prefix in prefixes:
+                builder = ijson.ObjectBuilder()
+                captured_path, captured_depth = path, len(stack)
+            if event == "start_map":
+                stack.append([path, False, None])
+            elif event == "start_array":
+                stack.append([path, True, 0])
+        if builder is not None:
+            builder.event(event, value)
+            if len(stack) == captured_depth:
+                body = _set_in(body, captured_path, builder.value)
+                builder = None
+    return body, items, shape
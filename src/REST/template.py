@@ -0,0 +1,61 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+from string import Formatter
+from urllib.parse import quote
+
+from .codec import dumps
+
+
+def encode_json(body, data=None):
+    # The json argument of requests is ignored when there is data
+    if body is None or data:
+        return None
+    return dumps(body).encode("utf-8")
+
+
+class RequestTemplate:
+    """A request resolved once, for sending it many times.
+
+    ``request`` is a prepared request of the library, having its URL
+    resolved and its query parsed. The endpoint may have ``{placeholders}``
+    that are filled in for each request from the ``path`` values.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.content = encode_json(request["body"], request["data"])
+        self.placeholders = {
+            field
+            for _, field, _, _ in Formatter().parse(request["path"])
+            if field is not None
+        }
+
+    def new_request(self, path=None, query=None, headers=None, body=None):
+        """Returns the request and its encoded body with the given changes."""
+        request = dict(self.request)
+        content = self.content
+        path = path or {}
+        missing = self.placeholders - set(path)
+        if missing:
+            raise RuntimeError(
+                "Request template has no value for: %s"
+                % (", ".join(sorted(missing)))
+            )
+        if self.placeholders:
+            values = {
+                key: quote(str(value), safe="") for key, value in path.items()
+            }
+            request["url"] = request["url"].format_map(values)
+            request["path"] = request["path"].format_map(values)
+        if query:
+            request["query"] = {**request["query"], **query}
+        if headers:
+            request["headers"] = {**request["headers"], **headers}
+        if body is not None:
+            request["body"] = body
+            content = encode_json(body, request["data"])
+        return request, content
@@ -0,0 +1,754 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+import os
+import socket
+import ssl
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from threading import Lock
+from time import monotonic, perf_counter_ns
+
+from requests import Request, Response, Session
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPDigestAuth
+from requests.exceptions import (
+    ConnectionError,
+    ContentDecodingError,
+    InvalidSchema,
+    InvalidURL,
+    ProxyError,
+    RequestException,
+    SSLError,
+    Timeout,
+    TooManyRedirects,
+)
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+from .compression import DecodingRaw
+
+# Phases measured by the connections, all in nanoseconds
+CONNECTION_PHASES = ("dns", "connect", "tls", "ttfb")
+
+# Size of the compressed chunks read when decompressing
+CHUNK_SIZE = 64 * 1024
+
+
+def resolve(host, port):
+    addresses = []
+    for *_, sockaddr in socket.getaddrinfo(
+        host, port, allowed_gai_family(), socket.SOCK_STREAM
+    ):
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses
+
+
+class Resolver:
+    """Resolves the host names for the connections of a transport.
+
+    ``pinned`` maps host names, or ``host:port`` pairs, to the addresses
+    to use instead of resolving them, like ``curl --resolve``. Other hosts
+    are resolved with ``getaddrinfo`` and cached for ``ttl`` seconds,
+    if it is positive.
+    """
+
+    def __init__(self, ttl=0, pinned=None):
+        self.ttl = ttl
+        self.pinned = {}
+        for host, addresses in (pinned or {}).items():
+            if isinstance(addresses, str):
+                addresses = [addresses]
+            self.pinned[host.lower()] = list(addresses)
+        self.cache = {}
+        self.lock = Lock()
+
+    def resolve(self, host, port):
+        host = host.lower()
+        pinned = self.pinned.get("%s:%s" % (host, port), self.pinned.get(host))
+        if pinned:
+            return pinned
+        if self.ttl <= 0:
+            return resolve(host, port)
+        with self.lock:
+            expires, addresses = self.cache.get((host, port), (0, None))
+        if expires > monotonic():
+            return addresses
+        addresses = resolve(host, port)
+        with self.lock:
+            self.cache[(host, port)] = (monotonic() + self.ttl, addresses)
+        return addresses
+
+    def forget(self, host, port):
+        with self.lock:
+            self.cache.pop((host.lower(), port), None)
+
+
+class _ConnectionTracking:
+    _secure = False
+    resolver = Resolver()
+    # Set when a new socket is opened, cleared by the first response on it
+    _fresh = True
+    _dns = _connect = _tls = 0
+    _connected_at = _sent_at = 0
+
+    def _new_conn(self):
+        started = perf_counter_ns()
+        try:
+            addresses = self.resolver.resolve(self._dns_host, self.port)  # type: ignore[attr-defined]
+        except socket.gaierror:
+            # Let urllib3 raise the error it raises for failed resolution
+            return super()._new_conn()  # type: ignore[misc]
+        resolved = perf_counter_ns()
+        host = self._dns_host  # type: ignore[has-type]
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()  # type: ignore[misc]
+                    break
+                except (ConnectTimeoutError, NewConnectionError):
+                    if address == addresses[-1]:
+                        # The cached addresses may be stale
+                        self.resolver.forget(host, self.port)  # type: ignore[attr-defined]
+                        raise
+        finally:
+            self._dns_host = host
+        self._dns = resolved - started
+        self._connect = perf_counter_ns() - resolved
+        return sock
+
+    def connect(self):
+        started = perf_counter_ns()
+        super().connect()  # type: ignore[misc]
+        self._connected_at = perf_counter_ns()
+        if self._secure:
+            # What is left after opening the socket is the TLS handshake
+            self._tls = self._connected_at - started - self._dns - self._connect
+        self._fresh = True
+
+    def request(self, *args, **kwargs):
+        self._sent_at = perf_counter_ns()
+        return super().request(*args, **kwargs)  # type: ignore[misc]
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)  # type: ignore[misc]
+        received_at = perf_counter_ns()
+        response.reused_connection = not self._fresh
+        response.tls_resumed = getattr(self.sock, "session_reused", None)  # type: ignore[attr-defined]
+        save_tls_session(self.sock)  # type: ignore[attr-defined]
+        response.received_at = received_at
+        response.timings = {
+            "dns": self._dns,
+            "connect": self._connect,
+            "tls": self._tls,
+            "ttfb": received_at - max(self._sent_at, self._connected_at),
+        }
+        self._fresh = False
+        self._dns = self._connect = self._tls = 0
+        return response
+
+
+class _HTTPConnection(_ConnectionTracking, HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_ConnectionTracking, HTTPSConnection):
+    _secure = True
+
+
+class _HTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _HTTPConnection
+
+
+class _HTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _HTTPSConnection
+
+
+POOL_CLASSES = {"http": _HTTPConnectionPool, "https": _HTTPSConnectionPool}
+
+
+def new_pool_classes(resolver):
+    # Connections are created by the pools, so they get the resolver
+    # of the transport as a class attribute
+    pool_classes = {}
+    for scheme, pool_cls in POOL_CLASSES.items():
+        connection_cls = type(
+            pool_cls.ConnectionCls.__name__,
+            (pool_cls.ConnectionCls,),
+            {"resolver": resolver},
+        )
+        pool_classes[scheme] = type(
+            pool_cls.__name__, (pool_cls,), {"ConnectionCls": connection_cls}
+        )
+    return pool_classes
+
+
+class PooledAdapter(HTTPAdapter):
+    def __init__(self, resolver=None, ssl_contexts=None, **kwargs):
+        self.pool_classes = new_pool_classes(resolver or Resolver())
+        self.ssl_contexts = ssl_contexts or SSLContexts()
+        super().__init__(**kwargs)
+
+    def build_connection_pool_key_attributes(self, request, verify, cert):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(
+            request, verify, cert
+        )
+        if host_params["scheme"] == "https":
+            # The pools are per context, so the certificates are not
+            # loaded again for each new connection
+            pool_kwargs = {
+                "cert_reqs": pool_kwargs["cert_reqs"],
+                "ssl_context": self.ssl_contexts.get(verify, cert),
+            }
+        return host_params, pool_kwargs
+
+    def cert_verify(self, conn, url, verify, cert):
+        if not url.lower().startswith("https"):
+            super().cert_verify(conn, url, verify, cert)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self.pool_classes
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if not proxy.lower().startswith("socks"):
+            manager.pool_classes_by_scheme = self.pool_classes
+        return manager
+
+
+TRANSPORTS = ("requests", "http2")
+
+
+def new_transport(
+    name,
+    pool_connections,
+    pool_maxsize,
+    max_retries,
+    keep_alive,
+    compression=False,
+    resolver=None,
+):
+    if name == "requests":
+        transport_cls = RequestsTransport
+    elif name == "http2":
+        transport_cls = HTTP2Transport
+    else:
+        raise RuntimeError(
+            "Unknown transport '%s', must be one of: %s"
+            % (name, ", ".join(TRANSPORTS))
+        )
+    return transport_cls(
+        pool_connections,
+        pool_maxsize,
+        max_retries,
+        keep_alive,
+        compression,
+        resolver,
+    )
+
+
+class Transport(ABC):
+    """Sends the requests of the library.
+
+    ``send`` takes the request of an instance and returns a
+    ``requests.Response`` having ``timings`` set by ``new_timings``.
+    If ``content`` is given, it is sent as the already encoded body.
+    Errors are raised as ``requests`` exceptions, regardless of the backend.
+    With ``compression``, the body is decompressed by `DecodingRaw`, and
+    ``response.raw.compression`` has the statistics once the body is read.
+    """
+
+    def __init__(
+        self,
+        pool_connections,
+        pool_maxsize,
+        max_retries,
+        keep_alive,
+        compression=False,
+        resolver=None,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.keep_alive = keep_alive
+        self.compression = compression
+        self.resolver = resolver or Resolver()
+        self.ssl_contexts = SSLContexts()
+
+    @abstractmethod
+    def send(self, request, stream=False, content=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.session = new_session(
+            self.pool_connections,
+            self.pool_maxsize,
+            self.max_retries,
+            self.keep_alive,
+            self.resolver,
+            self.ssl_contexts,
+        )
+
+    def send(self, request, stream=False, content=None):
+        started = perf_counter_ns()
+        response = self.session.request(
+            request["method"],
+            request["url"],
+            params=request["query"],
+            json=request["body"] if content is None else None,
+            data=request["data"] if content is None else content,
+            headers=request["headers"],
+            proxies=request["proxies"],
+            cert=request["cert"],
+            auth=request["auth"],
+            timeout=tuple(request["timeout"]),
+            allow_redirects=request["allowRedirects"],
+            verify=request["sslVerify"],
+            stream=stream or self.compression,
+        )
+        if self.compression:
+            response.raw = DecodingRaw(
+                response.raw,
+                response.raw.stream(CHUNK_SIZE, decode_content=False),
+                response.headers.get("Content-Encoding"),
+            )
+            if not stream:
+                response.content
+                response.raw.release_conn()
+        elif stream:
+            response.raw.decode_content = True
+        response.timings = new_timings(response, started, perf_counter_ns())
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class HTTP2Transport(Transport):
+    """Sends the requests with ``httpx``, multiplexing them over HTTP/2.
+
+    The requests are prepared with ``requests`` as they would be by
+    `RequestsTransport`, and the responses are converted back to
+    ``requests.Response`` objects.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError(
+                "HTTP/2 transport requires httpx with HTTP/2 support, "
+                + "install it with: pip install RESTinstance[http2]"
+            )
+        self.httpx = httpx
+        self.clients = {}
+        self.lock = Lock()
+
+    def client(self, request):
+        context = self.ssl_contexts.get(request["sslVerify"], request["cert"])
+        proxies = tuple(sorted((request["proxies"] or {}).items()))
+        key = (context, proxies)
+        with self.lock:
+            if key not in self.clients:
+                self.clients[key] = self.new_client(*key)
+            return self.clients[key]
+
+    def new_client(self, context, proxies):
+        httpx = self.httpx
+        limits = httpx.Limits(
+            max_connections=self.pool_connections * self.pool_maxsize,
+            max_keepalive_connections=(
+                self.pool_maxsize if self.keep_alive else 0
+            ),
+        )
+        options = {
+            "verify": context,
+            "http2": True,
+            "limits": limits,
+            "retries": self.max_retries,
+        }
+        mounts = {}
+        for scheme, proxy in proxies:
+            pattern = scheme if "://" in scheme else scheme + "://"
+            mounts[pattern] = httpx.HTTPTransport(proxy=proxy, **options)
+        transport = httpx.HTTPTransport(**options)
+        # httpx has no option for the network backend of the pool
+        pool = transport._pool
+        pool._network_backend = _ResolvingBackend(  # type: ignore[attr-defined]
+            pool._network_backend,  # type: ignore[attr-defined]
+            self.resolver,
+        )
+        # Instances must not depend on cookies set by the previous requests
+        cookies = CookieJar(DefaultCookiePolicy(allowed_domains=[]))
+        return httpx.Client(transport=transport, mounts=mounts, cookies=cookies)
+
+    def send(self, request, stream=False, content=None):
+        httpx = self.httpx
+        auth = request["auth"]
+        prepared = Request(
+            request["method"],
+            request["url"],
+            params=request["query"],
+            json=request["body"] if content is None else None,
+            data=request["data"] if content is None else content,
+            headers=request["headers"],
+            auth=None if isinstance(auth, HTTPDigestAuth) else auth,
+        ).prepare()
+        headers = CaseInsensitiveDict(prepared.headers)
+        headers.pop("Connection", None)  # not allowed in HTTP/2
+        connect, read = request["timeout"]
+        trace = _Trace()
+        started = perf_counter_ns()
+        client = self.client(request)
+        try:
+            response = client.send(
+                client.build_request(
+                    prepared.method,
+                    prepared.url,
+                    content=prepared.body,
+                    headers=dict(headers),
+                    timeout=httpx.Timeout(None, connect=connect, read=read),
+                    extensions={"trace": trace},
+                ),
+                auth=(
+                    httpx.DigestAuth(auth.username, auth.password)
+                    if isinstance(auth, HTTPDigestAuth)
+                    else None
+                ),
+                follow_redirects=request["allowRedirects"],
+                stream=stream or self.compression,
+            )
+        except httpx.TimeoutException as e:
+            raise Timeout(e, request=prepared)
+        except httpx.ConnectError as e:
+            cause = e.__context__
+            while cause is not None:
+                if isinstance(cause, ssl.SSLError):
+                    raise SSLError(e, request=prepared)
+                cause = cause.__context__
+            raise ConnectionError(e, request=prepared)
+        except httpx.ProxyError as e:
+            raise ProxyError(e, request=prepared)
+        except httpx.UnsupportedProtocol as e:
+            raise InvalidSchema(e, request=prepared)
+        except httpx.TransportError as e:
+            raise ConnectionError(e, request=prepared)
+        except httpx.TooManyRedirects as e:
+            raise TooManyRedirects(e, request=prepared)
+        except httpx.DecodingError as e:
+            raise ContentDecodingError(e, request=prepared)
+        except httpx.HTTPError as e:
+            raise RequestException(e, request=prepared)
+        except httpx.InvalidURL as e:
+            raise InvalidURL(e, request=prepared)
+        finished = perf_counter_ns()
+        converted = Response()
+        converted.status_code = response.status_code
+        converted.reason = response.reason_phrase
+        converted.headers = CaseInsensitiveDict()
+        for name, value in response.headers.raw:
+            name = name.decode(response.headers.encoding)
+            value = value.decode(response.headers.encoding)
+            if name in converted.headers:
+                value = converted.headers[name] + ", " + value
+            converted.headers[name] = value
+        converted.encoding = response.charset_encoding
+        converted.url = str(response.url)
+        received_at = trace.events.get("receive_response_headers", finished)
+        converted.elapsed = timedelta(
+            microseconds=(received_at - started) / 1e3
+        )
+        converted.request = prepared
+        raw = _RawResponse(response)
+        raw.version = response.http_version
+        raw.reused_connection = "connect_tcp" not in trace.events
+        ssl_object = trace.ssl_object
+        network_stream = response.extensions.get("network_stream")
+        if ssl_object is None and network_stream is not None:
+            ssl_object = network_stream.get_extra_info("ssl_object")
+        raw.tls_resumed = getattr(ssl_object, "session_reused", None)
+        save_tls_session(ssl_object)
+        raw.received_at = trace.events.get("receive_response_headers")
+        raw.timings = trace.timings()
+        if self.compression:
+            raw.chunks = response.iter_raw(CHUNK_SIZE)
+            converted.raw = DecodingRaw(
+                raw, raw.chunks, converted.headers.get("Content-Encoding")
+            )
+            if not stream:
+                converted.content
+                raw.close()
+                finished = perf_counter_ns()
+        else:
+            converted.raw = raw
+            if stream:
+                raw.chunks = response.iter_bytes()
+            else:
+                converted._content = response.content
+        converted.timings = new_timings(converted, started, finished)
+        return converted
+
+    def close(self):
+        with self.lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients.clear()
+
+
+class _ResolvingBackend:
+    # Connects httpcore to the addresses given by the resolver
+    def __init__(self, backend, resolver):
+        self.backend = backend
+        self.resolver = resolver
+
+    def connect_tcp(self, host, port, *args, **kwargs):
+        import httpcore
+
+        try:
+            addresses = self.resolver.resolve(host, port)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(e)
+        for address in addresses:
+            try:
+                return self.backend.connect_tcp(address, port, *args, **kwargs)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout):
+                if address == addresses[-1]:
+                    self.resolver.forget(host, port)
+                    raise
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+class _RawResponse:
+    # Reads a streamed httpx response like requests reads urllib3 responses
+    def __init__(self, response):
+        self.response = response
+        self.chunks = iter(())
+        self.buffer = b""
+
+    def read(self, amt=None, *args, **kwargs):
+        while amt is None or amt < 0 or len(self.buffer) < amt:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if amt is None or amt < 0:
+            amt = len(self.buffer)
+        data, self.buffer = self.buffer[:amt], self.buffer[amt:]
+        return data
+
+    def stream(self, amt=None, decode_content=None):
+        while True:
+            data = self.read(amt)
+            if not data:
+                return
+            yield data
+
+    def drain_conn(self):
+        self.read()
+
+    def release_conn(self):
+        self.response.close()
+
+    def close(self):
+        self.response.close()
+
+
+class _Trace:
+    # Collects httpcore trace events to the connection phases
+    def __init__(self):
+        self.events = {}
+        self.ssl_object = None
+
+    def __call__(self, name, info):
+        _, event, state = name.rsplit(".", 2)
+        if event == "start_tls" and state == "complete":
+            # Kept for the TLS session, the connection may be closed by
+            # the time the response has been read
+            stream = info["return_value"]
+            self.ssl_object = stream.get_extra_info("ssl_object")
+        if state == "started":
+            self.events.setdefault(event + ".started", perf_counter_ns())
+        elif state == "complete":
+            self.events[event] = perf_counter_ns()
+
+    def timings(self):
+        events = self.events
+        timings = {}
+        if "connect_tcp" in events:
+            timings["connect"] = (
+                events["connect_tcp"] - events["connect_tcp.started"]
+            )
+            timings["tls"] = 0
+            if "start_tls" in events:
+                timings["tls"] = (
+                    events["start_tls"] - events["start_tls.started"]
+                )
+        else:
+            timings["connect"] = timings["tls"] = timings["dns"] = 0
+        if "receive_response_headers" in events:
+            timings["ttfb"] = (
+                events["receive_response_headers"]
+                - events["send_request_headers.started"]
+            )
+        return timings
+
+
+class _ResumingContext(ssl.SSLContext):
+    # Resumes the TLS session of the previous connection to the same host
+    def __new__(cls, *args, **kwargs):
+        context = super().__new__(cls, *args, **kwargs)
+        context.sessions = {}
+        return context
+
+    def wrap_socket(self, sock, *args, server_hostname=None, **kwargs):
+        if kwargs.get("session") is None:
+            kwargs["session"] = self.sessions.get(server_hostname)
+        try:
+            return super().wrap_socket(
+                sock, *args, server_hostname=server_hostname, **kwargs
+            )
+        except ssl.SSLError:
+            self.sessions.pop(server_hostname, None)
+            raise
+
+
+def save_tls_session(sock):
+    # TLS 1.3 tickets arrive after the handshake, so the session is saved
+    # only after a response has been read from the socket
+    context = getattr(sock, "context", None)
+    session = getattr(sock, "session", None)
+    if isinstance(context, _ResumingContext) and session is not None:
+        context.sessions[sock.server_hostname] = session
+
+
+class SSLContexts:
+    """Caches the SSL contexts per the verification and client certificate.
+
+    A context is created again if any of its files has been modified.
+    """
+
+    def __init__(self):
+        self.contexts = {}
+        self.lock = Lock()
+
+    def get(self, verify, cert):
+        if isinstance(cert, list):
+            cert = tuple(cert)
+        paths = [verify] if isinstance(verify, str) else []
+        paths += [cert] if isinstance(cert, str) else list(cert or ())
+        modified = tuple(_modified(path) for path in paths)
+        with self.lock:
+            cached_modified, context = self.contexts.get(
+                (verify, cert), (None, None)
+            )
+            if context is None or cached_modified != modified:
+                context = new_ssl_context(verify, cert)
+                self.contexts[(verify, cert)] = (modified, context)
+            return context
+
+
+def _modified(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def new_ssl_context(verify, cert):
+    context = _ResumingContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    if isinstance(verify, str) and os.path.isdir(verify):
+        context.load_verify_locations(capath=verify)
+    elif isinstance(verify, str):
+        context.load_verify_locations(cafile=verify)
+    else:
+        context.load_verify_locations(cafile=DEFAULT_CA_BUNDLE_PATH)
+        if not verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+    if cert:
+        if isinstance(cert, str):
+            context.load_cert_chain(cert)
+        else:
+            context.load_cert_chain(*cert)
+    return context
+
+
+def new_session(
+    pool_connections,
+    pool_maxsize,
+    max_retries,
+    keep_alive,
+    resolver=None,
+    ssl_contexts=None,
+):
+    session = Session()
+    adapter = PooledAdapter(
+        resolver=resolver,
+        ssl_contexts=ssl_contexts,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=max_retries,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Instances must not depend on cookies set by the previous requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def reused_connection(response):
+    return getattr(response.raw, "reused_connection", None)
+
+
+def tls_resumed(response):
+    return getattr(response.raw, "tls_resumed", None)
+
+
+def connection_protocol(response):
+    version = getattr(response.raw, "version", None)
+    if isinstance(version, int):
+        return {10: "HTTP/1.0", 11: "HTTP/1.1", 20: "HTTP/2"}.get(version)
+    return version
+
+
+def new_timings(response, started, finished):
+    """Returns the phases of the request in seconds.
+
+    ``started`` and ``finished`` are ``perf_counter_ns`` readings taken
+    right before sending the request and after its body was downloaded.
+    """
+    measured = getattr(response.raw, "timings", {})
+    timings = {
+        phase: measured[phase] / 1e9 if phase in measured else None
+        for phase in CONNECTION_PHASES
+    }
+    received_at = getattr(response.raw, "received_at", None)
+    if received_at is not None:
+        timings["download"] = (finished - received_at) / 1e9
+    else:
+        timings["download"] = None
+    timings["total"] = (finished - started) / 1e9
+    return timings
@@ -0,0 +1,257 @@
+# RESTinstance (https://github.com/asyrjasalo/RESTinstance)
+# Robot Framework library for RESTful JSON APIs.
+#
+# Copyright(C) 2018- Anssi Syrjäsalo (http://a.syrjasalo.com)
+# Licensed under GNU Lesser General Public License v3 (LGPL-3.0).
+
+from collections import OrderedDict
+from copy import deepcopy
+from itertools import islice
+from threading import Lock
+
+from jsonschema import FormatChecker
+from jsonschema import validators as jv_validators
+
+from .codec import dumps
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# Validators kept per library, the least recently used are dropped
+MAX_VALIDATORS = 256
+
+FORMAT_CHECKER = FormatChecker()
+
+VALIDATORS = ("jsonschema", "compiled")
+
+# The draft of the code generated by fastjsonschema per jsonschema validator,
+# 2019-09 and 2020-12 only having the draft-07 keywords compiled
+COMPILED_DRAFTS = {
+    jv_validators.Draft4Validator: "http://json-schema.org/draft-04/schema#",
+    jv_validators.Draft6Validator: "http://json-schema.org/draft-06/schema#",
+    jv_validators.Draft7Validator: "http://json-schema.org/draft-07/schema#",
+    jv_validators.Draft201909Validator: (
+        "http://json-schema.org/draft-07/schema#"
+    ),
+    jv_validators.Draft202012Validator: (
+        "http://json-schema.org/draft-07/schema#"
+    ),
+}
+
+# Keywords that are not compiled, as fastjsonschema either does not have
+# them or does not validate them like jsonschema does for all the drafts.
+# It also takes booleans for numbers, which only makes the compiled schema
+# fail and jsonschema validate again, unless a keyword negates a subschema.
+# multipleOf of floats is not checked with the same rounding as jsonschema.
+NOT_COMPILED_KEYWORDS = frozenset(
+    (
+        "multipleOf",
+        "not",
+        "oneOf",
+        "if",
+        "then",
+        "else",
+        "$ref",
+        "$dynamicRef",
+        "$recursiveRef",
+        "$id",
+        "id",
+        "$anchor",
+        "$dynamicAnchor",
+        "$recursiveAnchor",
+        "format",
+        "dependencies",
+        "dependentRequired",
+        "dependentSchemas",
+        "prefixItems",
+        "additionalItems",
+        "unevaluatedItems",
+        "unevaluatedProperties",
+        "minContains",
+        "maxContains",
+        "contentEncoding",
+        "contentMediaType",
+        "contentSchema",
+    )
+)
+
+
+def new_validator(schema, top_schema=None):
+    """Returns a validator for ``schema``, of the draft of ``top_schema``.
+
+    Without ``"$schema"`` in ``top_schema``, the draft is that of ``schema``.
+    """
+    if top_schema and isinstance(top_schema, dict) and "$schema" in top_schema:
+        validator_cls = jv_validators.validator_for(top_schema)
+    else:
+        validator_cls = jv_validators.validator_for(schema)
+    return validator_cls(schema, format_checker=FORMAT_CHECKER)
+
+
+def error_messages(validator, instance, max_errors=1):
+    """Returns the messages of the first ``max_errors`` errors of ``instance``.
+
+    The errors are in the order jsonschema finds them, so the first one
+    is the one ``validate`` raises.
+    """
+    return [
+        str(error)
+        for error in islice(validator.iter_errors(instance), max_errors)
+    ]
+
+
+def compile_validator(validator):
+    """Returns ``validator`` with its schema compiled to Python code.
+
+    The validator is returned as is if its schema has keywords that
+    are not compiled, see ``NOT_COMPILED_KEYWORDS``.
+    """
+    draft = COMPILED_DRAFTS.get(type(validator))
+    schema = validator.schema
+    if draft is None or not isinstance(schema, dict):
+        return validator
+    if not _compilable(schema):
+        return validator
+    try:
+        compiled = fastjsonschema.compile(
+            dict(schema, **{"$schema": draft}),
+            use_default=False,
+            use_formats=False,
+            detailed_exceptions=False,
+        )
+    except Exception:
+        # Whatever fastjsonschema does not compile is left to jsonschema
+        return validator
+    return CompiledValidator(validator, compiled)
+
+
+def _compilable(schema):
+    if not isinstance(schema, dict):
+        return isinstance(schema, bool)
+    for keyword, value in schema.items():
+        if keyword in NOT_COMPILED_KEYWORDS:
+            return False
+        if keyword in ("enum", "const"):
+            if _has_boolean_or_bit(value):
+                return False
+        elif keyword in ("properties", "patternProperties"):
+            if not isinstance(value, dict):
+                return False
+            if not all(_compilable(item) for item in value.values()):
+                return False
+        elif keyword in ("allOf", "anyOf"):
+            if not isinstance(value, list):
+                return False
+            if not all(_compilable(item) for item in value):
+                return False
+        elif keyword in (
+            "items",
+            "additionalProperties",
+            "contains",
+            "propertyNames",
+        ):
+            if not _compilable(value):
+                return False
+    return True
+
+
+def _has_boolean_or_bit(value):
+    # Python takes True for 1 and False for 0, jsonschema does not
+    if isinstance(value, dict):
+        return any(_has_boolean_or_bit(item) for item in value.values())
+    if isinstance(value, list):
+        return any(_has_boolean_or_bit(item) for item in value)
+    return isinstance(value, bool) or (
+        isinstance(value, (int, float)) and value in (0, 1)
+    )
+
+
+class CompiledValidator:
+    """Validates with the compiled schema, and with jsonschema on failure.
+
+    The compiled code only tells whether the instance is valid, so when it
+    is not, the jsonschema validator is run to raise the same errors.
+    """
+
+    def __init__(self, validator, compiled):
+        self.validator = validator
+        self.compiled = compiled
+        self.schema = validator.schema
+
+    def validate(self, instance):
+        try:
+            self.compiled(instance)
+        except fastjsonschema.JsonSchemaValueException:
+            self.validator.validate(instance)
+
+    def is_valid(self, instance):
+        try:
+            self.compiled(instance)
+        except fastjsonschema.JsonSchemaValueException:
+            return self.validator.is_valid(instance)
+        return True
+
+    def iter_errors(self, instance):
+        try:
+            self.compiled(instance)
+        except fastjsonschema.JsonSchemaValueException:
+            return self.validator.iter_errors(instance)
+        return iter(())
+
+
+class ValidatorCache:
+    """Validators for schemas, reused for schemas with the same content.
+
+    The schemas are keyed by their canonical JSON, i.e. with sorted keys,
+    together with the draft given in the top schema.
+
+    With ``compiled``, the schemas validated against more than once are
+    compiled, see ``compile_validator``. Compiling takes longer than
+    validating once, but then validates many times faster.
+    """
+
+    def __init__(self, maxsize=MAX_VALIDATORS, compiled=False):
+        if compiled and fastjsonschema is None:
+            raise RuntimeError(
+                "Compiled validator requires fastjsonschema, "
+                + "install it with: pip install RESTinstance[compiled]"
+            )
+        self.maxsize = maxsize
+        self.compiled = compiled
+        self.validators = OrderedDict()
+        self.uncompiled = set()
+        self.lock = Lock()
+
+    def get(self, schema, top_schema=None):
+        draft = None
+        if isinstance(top_schema, dict):
+            draft = top_schema.get("$schema")
+        try:
+            key = (draft, dumps(schema, sort_keys=True))
+        except (TypeError, ValueError):
+            return new_validator(schema, top_schema)
+        with self.lock:
+            validator = self.validators.get(key)
+            if validator is not None:
+                self.validators.move_to_end(key)
+                if key not in self.uncompiled:
+                    return validator
+                self.uncompiled.discard(key)
+        if validator is not None:
+            validator = compile_validator(validator)
+            with self.lock:
+                if key in self.validators:
+                    self.validators[key] = validator
+            return validator
+        # The schema may be modified later on, e.g. by assertion keywords
+        validator = new_validator(deepcopy(schema), top_schema)
+        with self.lock:
+            self.validators[key] = validator
+            if self.compiled:
+                self.uncompiled.add(key)
+            if len(self.validators) > self.maxsize:
+                dropped, _ = self.validators.popitem(last=False)
+                self.uncompiled.discard(dropped)
+        return validator
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from src import REST
+from src.REST.aggregate import EndpointSchemas, path_template
+from src.REST.codec import loads
+
+from .server import JSONServer
+
+
+class TestEndpointSchemas(unittest.TestCase):
+    def test_path_template(self):
+        self.assertEqual(path_template("/users/12/posts"), "/users/{id}/posts")
+        self.assertEqual(
+            path_template("/a/123e4567-e89b-12d3-a456-426614174000"),
+            "/a/{id}",
+        )
+        self.assertEqual(path_template("/users/me"), "/users/me")
+
+    def test_responses_are_merged_per_endpoint_and_status(self):
+        schemas = EndpointSchemas()
+        for i, body in enumerate(({"id": 1, "name": "a"}, {"id": 2})):
+            schemas.add(
+                {
+                    "method": "GET",
+                    "path": "/users/%d" % (i),
+                    "query": {},
+                    "body": None,
+                },
+                {"status": 200, "body": body},
+            )
+        schemas.add(
+            {
+                "method": "GET",
+                "path": "/users/9",
+                "query": {"a": "1"},
+                "body": None,
+            },
+            {"status": 404, "body": {"error": "not found"}},
+        )
+        endpoint = schemas.to_json()["GET /users/{id}"]
+        self.assertEqual(endpoint["requests"], 3)
+        self.assertEqual(endpoint["request"]["body"], {})
+        self.assertEqual(endpoint["responses"]["200"]["required"], ["id"])
+        self.assertEqual(
+            list(endpoint["responses"]["404"]["properties"]), ["error"]
+        )
+
+
+class TestOutputEndpointSchemas(unittest.TestCase):
+    def test_not_aggregated_by_default(self):
+        library = REST.REST("http://localhost", instances="[]")
+        self.assertRaises(RuntimeError, library.output_endpoint_schemas)
+        library.close()
+
+    def test_output(self):
+        with JSONServer() as server, tempfile.TemporaryDirectory() as dir:
+            library = REST.REST(
+                server.url, instances="[]", aggregate_schemas=True
+            )
+            library.post("/users", {"id": 1})
+            library.post("/users", {"id": 2, "name": "b"})
+            path = os.path.join(dir, "endpoints.json")
+            library.output_endpoint_schemas(path, also_console=False)
+            library.close()
+            with open(path, encoding="utf-8") as file:
+                endpoints = loads(file.read())
+        endpoint = endpoints["POST /users"]
+        self.assertEqual(endpoint["requests"], 2)
+        self.assertEqual(endpoint["request"]["body"]["required"], ["id"])
+        self.assertIn("200", endpoint["responses"])
+
+
+if __name__ == "__main__":
+    unittest.main()
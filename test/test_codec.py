@@ -0,0 +1,71 @@
+import json
+import unittest
+from importlib.util import find_spec
+from unittest.mock import patch
+
+from src.REST import codec
+
+VALUES = [
+    {"a": [1, 2, {"b": "ä\n€", "c": []}, {}], "z": None, "n": 1.5},
+    {"b": 1, "a": {"d": True, "c": False}},
+    [[[]], {}],
+    {1: "integer key"},
+    (1, "tuple"),
+    "string",
+    2**70,
+]
+
+
+class TestCodec(unittest.TestCase):
+    def assert_same_as_stdlib(self):
+        for value in VALUES:
+            for sort_keys in (False, True):
+                self.assertEqual(
+                    codec.dumps(value, indent=4, sort_keys=sort_keys),
+                    json.dumps(
+                        value,
+                        ensure_ascii=False,
+                        indent=4,
+                        separators=(",", ": "),
+                        sort_keys=sort_keys,
+                    ),
+                )
+            text = codec.dumps(value)
+            self.assertEqual(codec.loads(text), json.loads(text))
+            self.assertEqual(
+                codec.loads(text.encode("utf-8")), json.loads(text)
+            )
+
+    def test_stdlib(self):
+        with patch.object(codec, "orjson", None):
+            self.assert_same_as_stdlib()
+
+    @unittest.skipUnless(find_spec("orjson"), "orjson is not installed")
+    def test_orjson(self):
+        self.assert_same_as_stdlib()
+
+    def test_invalid_json_raises_value_error(self):
+        for text in ("", "{", "[1,]", b"\xff"):
+            self.assertRaises(ValueError, codec.loads, text)
+
+    def test_big_integers_are_kept(self):
+        self.assertEqual(codec.loads("[%s]" % (2**70)), [2**70])
+        for number in (-(2**63) - 1, -(2**63), 2**63, 2**64 - 1, 2**64):
+            text = "[%s]" % (number)
+            self.assertEqual(codec.loads(text), [number])
+            self.assertIsInstance(codec.loads(text.encode("utf-8"))[0], int)
+
+    def test_default(self):
+        class Auth:
+            def __init__(self):
+                self.username = "user"
+
+        self.assertEqual(
+            codec.loads(codec.dumps({"auth": Auth()}, default=vars)),
+            {"auth": {"username": "user"}},
+        )
+        self.assertRaises(TypeError, codec.dumps, {"auth": Auth()})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import gzip
+import json
+import unittest
+import zlib
+from importlib.util import find_spec
+
+from src import REST
+from src.REST.compression import DecodingRaw, accept_encoding
+
+from .server import JSONHandler, JSONServer
+
+USERS = [{"id": i, "name": "User %s" % (i)} for i in range(200)]
+
+
+class GzipHandler(JSONHandler):
+    def do_GET(self):
+        payload = json.dumps(USERS).encode("utf-8")
+        accepted = self.headers.get("Accept-Encoding", "")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in accepted:
+            payload = gzip.compress(payload)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestDecodingRaw(unittest.TestCase):
+    def decode(self, chunks, encoding, amt=None):
+        raw = DecodingRaw(None, chunks, encoding)
+        return b"".join(raw.stream(amt)), raw.compression
+
+    def test_gzip_in_chunks(self):
+        encoded = gzip.compress(b"x" * 10000)
+        chunks = [encoded[i : i + 7] for i in range(0, len(encoded), 7)]
+        body, compression = self.decode(chunks, "gzip", amt=100)
+        self.assertEqual(body, b"x" * 10000)
+        self.assertEqual(compression["encoding"], "gzip")
+        self.assertEqual(compression["bytes"], len(encoded))
+        self.assertEqual(compression["decodedBytes"], 10000)
+
+    def test_deflate_with_and_without_zlib_wrapper(self):
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        raw_deflate = compressor.compress(b"abc") + compressor.flush()
+        for encoded in (zlib.compress(b"abc"), raw_deflate):
+            self.assertEqual(self.decode([encoded], "deflate")[0], b"abc")
+
+    def test_stacked_encodings_are_decoded_in_reverse(self):
+        encoded = zlib.compress(gzip.compress(b"abc"))
+        self.assertEqual(self.decode([encoded], "gzip, deflate")[0], b"abc")
+
+    def test_identity_and_unknown_encodings_are_passed(self):
+        for encoding in (None, "identity", "compress"):
+            body, compression = self.decode([b"abc"], encoding)
+            self.assertEqual(body, b"abc")
+            self.assertEqual(compression["bytes"], 3)
+
+    @unittest.skipUnless(
+        find_spec("brotli") or find_spec("brotlicffi"), "brotli is missing"
+    )
+    def test_brotli(self):
+        self.assertIn("br", accept_encoding())
+        try:
+            import brotlicffi as brotli
+        except ImportError:
+            import brotli
+        body, _ = self.decode([brotli.compress(b"abc")], "br")
+        self.assertEqual(body, b"abc")
+
+
+class TestCompression(unittest.TestCase):
+    def test_off_by_default(self):
+        with JSONServer(GzipHandler) as server:
+            rest = REST.REST(server.url, instances="[]")
+            rest.get("/users")
+        instance = rest.instances[-1]
+        self.assertNotIn("Accept-Encoding", instance["request"]["headers"])
+        self.assertNotIn("compression", instance["response"])
+        self.assertEqual(instance["response"]["body"], USERS)
+
+    def test_statistics(self):
+        with JSONServer(GzipHandler) as server:
+            rest = REST.REST(server.url, instances="[]", compression=True)
+            rest.get("/users")
+            rest.get("/users")
+            rest.close()
+        instance = rest.instances[-1]
+        self.assertEqual(
+            instance["request"]["headers"]["Accept-Encoding"],
+            accept_encoding(),
+        )
+        response = instance["response"]
+        self.assertEqual(response["body"], USERS)
+        compression = response["compression"]
+        self.assertEqual(compression["encoding"], "gzip")
+        self.assertEqual(
+            compression["decodedBytes"], len(json.dumps(USERS).encode())
+        )
+        self.assertLess(compression["bytes"], compression["decodedBytes"])
+        self.assertGreaterEqual(compression["seconds"], 0)
+        self.assertTrue(response["connection"]["reused"])
+
+    @unittest.skipUnless(find_spec("ijson"), "ijson is not installed")
+    def test_streaming(self):
+        with JSONServer(GzipHandler) as server:
+            rest = REST.REST(server.url, instances="[]", compression=True)
+            rest.get("/users", projection="$[*].id")
+            rest.close()
+        response = rest.instances[-1]["response"]
+        self.assertEqual(response["body"], [{"id": i} for i in range(200)])
+        self.assertEqual(
+            response["stream"]["bytes"], response["compression"]["decodedBytes"]
+        )
+
+    @unittest.skipUnless(find_spec("httpx"), "httpx is not installed")
+    def test_http2_transport(self):
+        with JSONServer(GzipHandler) as server:
+            rest = REST.REST(
+                server.url,
+                instances="[]",
+                compression=True,
+                transport="http2",
+            )
+            rest.get("/users")
+            rest.close()
+        response = rest.instances[-1]["response"]
+        self.assertEqual(response["body"], USERS)
+        self.assertEqual(response["compression"]["encoding"], "gzip")
+        self.assertLess(
+            response["compression"]["bytes"],
+            response["compression"]["decodedBytes"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from src import REST
+
+from .server import JSONServer
+
+
+class TestSendRequestsConcurrently(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = JSONServer().__enter__()
+        self.library = REST.REST(self.server.url, instances="[]")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.library.close()
+        self.server.__exit__(None, None, None)
+        return super().tearDown()
+
+    def test_instances_are_created_in_given_order(self):
+        specs = [
+            {"method": "POST", "endpoint": "/users", "body": {"id": i}}
+            for i in range(20)
+        ]
+        specs.append({"endpoint": "/users?_limit=2", "query": {"q": "x"}})
+        responses = self.library.send_requests_concurrently(
+            specs, max_workers=4
+        )
+        self.assertEqual(len(self.library.instances), 21)
+        for i, instance in enumerate(self.library.instances[:20]):
+            self.assertEqual(instance["request"]["method"], "POST")
+            self.assertEqual(instance["response"]["body"]["body"], {"id": i})
+        self.assertEqual(
+            self.library.instances[-1]["request"]["query"],
+            {"_limit": "2", "q": "x"},
+        )
+        self.assertEqual(responses[-1]["body"]["method"], "GET")
+
+    def test_requests_from_json_string(self):
+        self.library.send_requests_concurrently(
+            '[{"method": "delete", "endpoint": "users/1"}]'
+        )
+        self.assertEqual(
+            self.library.instances[-1]["response"]["body"]["path"], "/users/1"
+        )
+
+    def test_responses_are_validated_against_expectations(self):
+        self.library.expect_response({"status": {"enum": [201]}})
+        self.assertRaises(
+            AssertionError,
+            self.library.send_requests_concurrently,
+            [{"endpoint": "/users/1"}, {"endpoint": "/users/2"}],
+        )
+        self.assertEqual(self.library.instances, [])
+
+    def test_unknown_method(self):
+        self.assertRaises(
+            RuntimeError,
+            self.library.send_requests_concurrently,
+            [{"method": "FETCH", "endpoint": "/users"}],
+        )
+
+    def test_missing_endpoint(self):
+        self.assertRaises(
+            RuntimeError,
+            self.library.send_requests_concurrently,
+            [{"method": "GET"}],
+        )
@@ -0,0 +1,104 @@
+import unittest
+from importlib.util import find_spec
+from unittest.mock import patch
+
+from src import REST
+from src.REST.transport import Resolver
+
+from .server import JSONServer
+
+
+class TestResolver(unittest.TestCase):
+    def test_pinned_hosts_are_not_resolved(self):
+        resolver = Resolver(
+            pinned={"API.test": "10.0.0.1", "api.test:8443": ["10.0.0.2"]}
+        )
+        with patch("src.REST.transport.resolve") as resolve:
+            self.assertEqual(resolver.resolve("api.test", 80), ["10.0.0.1"])
+            self.assertEqual(resolver.resolve("api.test", 8443), ["10.0.0.2"])
+        resolve.assert_not_called()
+
+    def test_addresses_are_cached_for_ttl(self):
+        resolver = Resolver(ttl=60)
+        with patch(
+            "src.REST.transport.resolve", return_value=["10.0.0.1"]
+        ) as resolve:
+            resolver.resolve("api.test", 80)
+            resolver.resolve("api.test", 80)
+            resolver.resolve("api.test", 443)
+        self.assertEqual(
+            [call.args for call in resolve.call_args_list],
+            [("api.test", 80), ("api.test", 443)],
+        )
+
+    def test_no_cache_without_ttl(self):
+        resolver = Resolver()
+        with patch(
+            "src.REST.transport.resolve", return_value=["10.0.0.1"]
+        ) as resolve:
+            resolver.resolve("api.test", 80)
+            resolver.resolve("api.test", 80)
+        self.assertEqual(resolve.call_count, 2)
+        self.assertEqual(resolver.cache, {})
+
+    def test_forget(self):
+        resolver = Resolver(ttl=60)
+        with patch(
+            "src.REST.transport.resolve", return_value=["10.0.0.1"]
+        ) as resolve:
+            resolver.resolve("api.test", 80)
+            resolver.forget("api.test", 80)
+            resolver.resolve("api.test", 80)
+        self.assertEqual(resolve.call_count, 2)
+
+
+class TestPinnedHosts(unittest.TestCase):
+    def setUp(self):
+        self.server = JSONServer().__enter__()
+        self.port = self.server.httpd.server_address[1]
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def get(self, **options):
+        library = REST.REST(
+            "http://api.test:%s" % (self.port),
+            instances="[]",
+            resolve={"api.test": "127.0.0.1"},
+            **options,
+        )
+        try:
+            return library.get("/users")
+        finally:
+            library.close()
+
+    def test_pinned_host(self):
+        response = self.get()
+        self.assertEqual(response["status"], 200)
+        self.assertEqual(response["body"]["path"], "/users")
+
+    @unittest.skipUnless(find_spec("httpx"), "httpx is not installed")
+    def test_pinned_host_with_http2_transport(self):
+        response = self.get(transport="http2")
+        self.assertEqual(response["status"], 200)
+
+    def test_invalid_pinned_addresses(self):
+        self.assertRaises(
+            RuntimeError, REST.REST, resolve={"api.test": [127, 0, 0, 1]}
+        )
+
+    def test_cached_resolution(self):
+        library = REST.REST(self.server.url, instances="[]", dns_ttl=60)
+        with patch(
+            "src.REST.transport.resolve", wraps=lambda host, port: ["127.0.0.1"]
+        ) as resolve:
+            library.get("/users")
+            # Closing the pools makes the next request open a new connection
+            library.close()
+            library.get("/users")
+        library.close()
+        self.assertEqual(resolve.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import REST
+from src.REST import files
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        files.clear_cache()
+        self.dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.dir.name, "cache")
+        self.env = mock.patch.dict(
+            os.environ, {files.CACHE_DIR_VARIABLE: self.cache_dir}
+        )
+        self.env.start()
+        self.library = REST.REST("http://localhost", instances="[]")
+
+    def tearDown(self):
+        self.env.stop()
+        self.library.close()
+        self.dir.cleanup()
+
+    def write(self, name, content, mtime_ns=None):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def test_file_is_parsed_once(self):
+        path = self.write("schema.json", '{"type": "object"}')
+        with mock.patch.object(
+            files, "_read_bytes", wraps=files._read_bytes
+        ) as read:
+            self.assertEqual(self.library.input(path), {"type": "object"})
+            self.assertEqual(self.library._input_object(path)["type"], "object")
+        self.assertEqual(read.call_count, 1)
+
+    def test_modified_file_is_parsed_again(self):
+        path = self.write("schema.json", '{"a": 1}', mtime_ns=10**18)
+        self.assertEqual(self.library.input(path), {"a": 1})
+        self.write("schema.json", '{"a": 2}', mtime_ns=10**18 + 1)
+        self.assertEqual(self.library.input(path), {"a": 2})
+
+    def test_cached_value_is_not_modified(self):
+        path = self.write("schema.json", '{"properties": {}}')
+        self.library._input_object(path)["properties"]["id"] = {}
+        self.assertEqual(self.library._input_object(path)["properties"], {})
+
+    def test_yaml_file(self):
+        path = self.write("schema.yaml", "type: array\nitems:\n  - 1\n")
+        self.assertEqual(self.library.input(path)["items"], [1])
+        self.assertRaises(RuntimeError, self.library._input_array, path)
+
+    def test_parsed_yaml_is_cached_on_disk(self):
+        path = self.write("spec.yaml", "openapi: 3.0.0\npaths: {}\n")
+        self.assertEqual(self.library.input(path)["paths"], {})
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        files.clear_cache()
+        with mock.patch.object(files, "load_yaml") as load_yaml:
+            self.assertEqual(self.library.input(path)["openapi"], "3.0.0")
+        load_yaml.assert_not_called()
+
+    def test_json_and_unmarshallable_yaml_are_not_cached_on_disk(self):
+        self.library.input(self.write("a.json", '{"a": 1}'))
+        path = self.write("dates.yaml", "released: 2018-01-01\n")
+        self.assertIn("released", self.library.input(path))
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_disk_cache_is_off_by_default(self):
+        del os.environ[files.CACHE_DIR_VARIABLE]
+        self.library.input(self.write("a.yaml", "a: 1\n"))
+        self.assertIsNone(files.cache_dir())
+        os.environ[files.CACHE_DIR_VARIABLE] = ""
+        self.library.input(self.write("b.yaml", "b: 1\n"))
+        self.assertIsNone(files.cache_dir())
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        path = self.write("spec.yaml", "openapi: 3.0.0\n")
+        with mock.patch.object(files.os, "replace", side_effect=OSError):
+            self.assertEqual(self.library.input(path)["openapi"], "3.0.0")
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_file_prefix(self):
+        path = self.write("[brackets].json", "[1, 2]")
+        self.assertEqual(self.library.input("file:" + path), [1, 2])
+        self.assertEqual(self.library._input_array("file:" + path), [1, 2])
+        self.assertRaises(
+            RuntimeError, self.library.input, "file:" + path + ".missing"
+        )
+
+    def test_inline_json_is_not_probed(self):
+        with mock.patch.object(files.os.path, "isfile") as isfile:
+            self.assertEqual(self.library.input('{"a": 1}'), {"a": 1})
+            self.assertEqual(self.library._input_array(" [1]"), [1])
+        isfile.assert_not_called()
+
+    def test_data_file(self):
+        path = self.write("data.bin", "a=1")
+        self.assertEqual(self.library._input_data(path), b"a=1")
+        self.assertEqual(self.library._input_data("file:" + path), b"a=1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+from src import REST
+from src.REST.codec import loads
+from src.REST.history import InstanceHistory
+from src.REST.journal import Journal, read_journal
+
+from .server import JSONServer
+
+
+def new_instance(i):
+    return {
+        "request": {"method": "GET", "url": "http://api.test/%d" % (i)},
+        "response": {"status": 200, "seconds": 0.1, "body": [i]},
+        "schema": {},
+        "spec": {},
+    }
+
+
+class TestInstanceHistory(unittest.TestCase):
+    def test_all_are_retained_by_default(self):
+        history = InstanceHistory(new_instance(i) for i in range(5))
+        self.assertEqual(len(history), 5)
+        self.assertTrue(all("schema" in instance for instance in history))
+
+    def test_older_are_summarized(self):
+        history = InstanceHistory(max_instances=2)
+        for i in range(5):
+            history.append(new_instance(i))
+        self.assertEqual(len(history), 5)
+        self.assertEqual(history.summaries, 3)
+        self.assertEqual(
+            history[0],
+            {
+                "request": {"method": "GET", "url": "http://api.test/0"},
+                "response": {"status": 200, "seconds": 0.1},
+            },
+        )
+        self.assertEqual(history[-1], new_instance(4))
+        self.assertEqual(history[-2], new_instance(3))
+
+    def test_older_are_dropped(self):
+        history = InstanceHistory(
+            (new_instance(i) for i in range(5)), 2, "drop"
+        )
+        self.assertEqual(list(history), [new_instance(3), new_instance(4)])
+
+
+class TestRetentionOnImport(unittest.TestCase):
+    def test_invalid_retention(self):
+        self.assertRaises(
+            RuntimeError, REST.REST, instances="[]", retention="forever"
+        )
+
+    def test_last_instance_is_retained(self):
+        with JSONServer() as server:
+            library = REST.REST(
+                server.url, instances="[]", max_instances=1, retention="drop"
+            )
+            library.get("/first")
+            library.get("/second")
+            library.integer("response status", 200)
+            library.close()
+        self.assertEqual(len(library.instances), 1)
+        self.assertEqual(library.instances[0]["request"]["path"], "/second")
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_instance_is_written_when_next_is_appended(self):
+        for name in ("instances.jsonl", "instances.jsonl.gz"):
+            path = os.path.join(self.dir.name, name)
+            history = InstanceHistory(journal=Journal(path))
+            history.append(new_instance(0))
+            history[-1]["schema"]["updated"] = True
+            history.append(new_instance(1))
+            history.journal.flush()
+            lines = list(read_journal(path))
+            self.assertEqual(len(lines), 1)
+            self.assertTrue(loads(lines[0])["schema"]["updated"])
+            history.close()
+            self.assertEqual(
+                [loads(line) for line in read_journal(path)][1],
+                new_instance(1),
+            )
+
+    def test_summarized_instances_are_written_fully(self):
+        path = os.path.join(self.dir.name, "instances.jsonl")
+        history = InstanceHistory(
+            (new_instance(i) for i in range(3)), 1, "drop", Journal(path)
+        )
+        history.close()
+        self.assertEqual(
+            [loads(line) for line in read_journal(path)],
+            [new_instance(i) for i in range(3)],
+        )
+
+    def test_rest_instances_converts_the_journal(self):
+        journal = os.path.join(self.dir.name, "instances.jsonl.gz")
+        output = os.path.join(self.dir.name, "instances.json")
+        with JSONServer() as server:
+            library = REST.REST(
+                server.url, instances="[]", max_instances=1, journal=journal
+            )
+            library.get("/first")
+            library.get("/second")
+            library.rest_instances(output)
+            library.close()
+        with open(output, encoding="utf-8") as file:
+            instances = loads(file.read())
+        self.assertEqual(
+            [instance["request"]["path"] for instance in instances],
+            ["/first", "/second"],
+        )
+        self.assertEqual(len(list(read_journal(journal))), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from genson import SchemaBuilder
+from genson.schema.node import SchemaGenerationError
+
+from src.REST.inference import infer_schema
+
+
+def genson_schema(value):
+    builder = SchemaBuilder(schema_uri=False)
+    builder.add_object(value)
+    return builder.to_schema()
+
+
+def random_value(rnd, depth=0):
+    kind = rnd.choice(
+        ["null", "bool", "int", "float", "str", "list", "dict"][
+            : 7 if depth < 4 else 5
+        ]
+    )
+    if kind == "null":
+        return None
+    if kind == "bool":
+        return rnd.random() < 0.5
+    if kind == "int":
+        return rnd.randint(-5, 5)
+    if kind == "float":
+        return rnd.random()
+    if kind == "str":
+        return rnd.choice("abc")
+    if kind == "list":
+        return [random_value(rnd, depth + 1) for _ in range(rnd.randint(0, 4))]
+    keys = rnd.sample("abcde", rnd.randint(0, 4))
+    return {key: random_value(rnd, depth + 1) for key in keys}
+
+
+class TestInferSchema(unittest.TestCase):
+    def test_same_schema_as_genson(self):
+        rnd = random.Random(0)
+        for _ in range(2000):
+            value = [random_value(rnd) for _ in range(rnd.randint(0, 6))]
+            self.assertEqual(infer_schema(value), genson_schema(value))
+            self.assertEqual(
+                list(infer_schema(value)), list(genson_schema(value))
+            )
+
+    def test_repeated_items(self):
+        items = [{"id": i, "tags": ["a"] * i, "x": None} for i in range(50)]
+        items.insert(10, {"id": 1.5})
+        self.assertEqual(infer_schema(items), genson_schema(items))
+        body = {"data": items, "total": 51}
+        self.assertEqual(infer_schema(body), genson_schema(body))
+
+    def test_schema_is_a_copy(self):
+        schema = infer_schema({"id": 1})
+        schema["properties"]["id"]["enum"] = [1]
+        self.assertEqual(infer_schema({"id": 2}), genson_schema({"id": 2}))
+
+    def test_sampled_arrays(self):
+        items = [{"id": i} for i in range(100)]
+        schema = infer_schema(items, sample_items=10)
+        self.assertEqual(schema.pop("$comment")[:13], "Inferred from")
+        self.assertEqual(schema, genson_schema(items))
+        items.append({"id": "last"})
+        self.assertEqual(
+            infer_schema(items, sample_items=60), genson_schema(items)
+        )
+
+    def test_other_types_are_given_to_genson(self):
+        self.assertRaises(SchemaGenerationError, infer_schema, ("a", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
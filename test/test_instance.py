@@ -0,0 +1,152 @@
+import os
+import tempfile
+import unittest
+from copy import deepcopy
+
+from src import REST
+from src.REST.codec import dumps, loads
+from src.REST.instance import Instance, to_json
+
+from .server import JSONServer
+
+
+class TestInstance(unittest.TestCase):
+    def test_schema_is_built_on_first_access(self):
+        calls = []
+
+        def new_schema():
+            calls.append(1)
+            return {"type": "object"}
+
+        instance = Instance({}, {}, {}, new_schema=new_schema)
+        self.assertEqual(calls, [])
+        self.assertEqual(instance["schema"], {"type": "object"})
+        instance["schema"]["title"] = "GET /"
+        self.assertEqual(instance.schema["title"], "GET /")
+        self.assertEqual(calls, [1])
+
+    def test_reads_and_serializes_as_a_dict(self):
+        instance = Instance({"method": "GET"}, {"status": 200}, {}, {})
+        expected = {
+            "request": {"method": "GET"},
+            "response": {"status": 200},
+            "schema": {},
+            "spec": {},
+        }
+        self.assertEqual(instance, expected)
+        self.assertEqual(dict(instance), expected)
+        self.assertEqual(loads(dumps([instance], default=to_json)), [expected])
+        self.assertEqual(deepcopy(instance), expected)
+        self.assertRaises(KeyError, instance.__getitem__, "body")
+        self.assertFalse(hasattr(instance, "__dict__"))
+
+
+class TestInstanceSchema(unittest.TestCase):
+    def setUp(self):
+        self.server = JSONServer().__enter__()
+        self.library = REST.REST(self.server.url, instances="[]")
+
+    def tearDown(self):
+        self.library.close()
+        self.server.__exit__(None, None, None)
+
+    def test_schema_has_the_expectations_at_the_time_of_request(self):
+        self.library.expect_response({"status": {"enum": [200]}})
+        self.library.get("/first")
+        self.library.expect_response({"status": {"enum": [201]}})
+        self.library.get("/second", validate=False)
+        first, second = self.library.instances
+        response = first["schema"]["properties"]["response"]["properties"]
+        self.assertEqual(response["status"], {"enum": [200]})
+        response = second["schema"]["properties"]["response"]["properties"]
+        self.assertEqual(response["status"], {"enum": [201]})
+        self.assertEqual(
+            first["schema"]["title"], "GET %s/first" % (self.server.url)
+        )
+
+    def test_assertions_update_only_the_last_schema(self):
+        self.library.get("/first")
+        self.library.get("/second")
+        self.library.integer("response status", 200)
+        first, second = self.library.instances
+        status = second["schema"]["properties"]["response"]["properties"][
+            "status"
+        ]
+        self.assertEqual(status["type"], "integer")
+        self.assertNotIn(
+            "status", first["schema"]["properties"]["response"]["properties"]
+        )
+
+    def test_schema_is_inferred_when_needed(self):
+        response = self.library.get("/users")
+        self.assertEqual(response["timings"]["inference"], 0)
+        self.library.object("response body")
+        self.assertGreater(response["timings"]["inference"], 0)
+        schema = self.library.instances[-1]["schema"]
+        body = schema["properties"]["response"]["properties"]["body"]
+        self.assertEqual(body["type"], "object")
+
+    def test_inference_can_be_switched_off(self):
+        library = REST.REST(self.server.url, instances="[]", infer_schema=False)
+        library.get("/users")
+        library.string("response body path", "/users")
+        library.close()
+        schema = library.instances[-1]["schema"]
+        self.assertNotIn("body", schema["properties"]["request"]["properties"])
+        body = schema["properties"]["response"]["properties"]["body"]
+        self.assertEqual(body["properties"]["path"]["type"], "string")
+
+    def test_jsonpath_assertions_without_inference(self):
+        library = REST.REST(self.server.url, instances="[]", infer_schema=False)
+        library.post("/users", {"id": 1})
+        library.string("$.path", "/users")
+        library.integer("$.body.id", 1)
+        schema = library.output_schema("$.body.id", also_console=False)
+        self.assertEqual(schema["type"], "integer")
+        schema = library.output_schema("$", also_console=False)
+        self.assertEqual(schema["properties"]["path"]["type"], "string")
+        library.close()
+
+    def test_sample_items_of_the_request(self):
+        library = REST.REST(self.server.url, instances="[]", sample_items=1)
+        library.post("/users", [1, 2, 3])
+        self.assertIn(
+            "$comment",
+            library.output_schema("request body", also_console=False),
+        )
+        library.post("/users", [1, 2, 3], sample_items=0)
+        self.assertNotIn(
+            "$comment",
+            library.output_schema("request body", also_console=False),
+        )
+        library.close()
+
+    def test_credentials_are_not_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = os.path.join(directory, "instances.jsonl")
+            library = REST.REST(
+                self.server.url, instances="[]", journal=journal
+            )
+            library.set_client_authentication("basic", "user", "s3cret")
+            library.get("/users")
+            output = library.output(also_console=False)
+            self.assertEqual(output["request"]["auth"].password, "s3cret")
+            instances = os.path.join(directory, "instances.json")
+            library.output("", os.path.join(directory, "output.json"))
+            library.rest_instances(instances)
+            library.get("/users")
+            library.close()
+            for name in os.listdir(directory):
+                with open(os.path.join(directory, name)) as file:
+                    content = file.read()
+                self.assertIn("HTTPBasicAuth", content)
+                self.assertNotIn("s3cret", content)
+
+    def test_output_has_no_schema(self):
+        self.library.get("/users")
+        output = self.library.output(also_console=False)
+        self.assertEqual(list(output), ["request", "response"])
+
+
+if __name__ == "__main__":
+    unittest.main()
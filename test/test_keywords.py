@@ -116,6 +116,7 @@ class TestKeywords(unittest.TestCase):
         self.assertEqual(observed, expected)
 
     def test_find_by_field_without_existing_schema(self):
+        self.library.instances.append({"schema": {"properties": "abba"}})
         self.assertRaises(AssertionError, self.library._find_by_field, "abba")
 
     def test_find_by_field_raises_runtime_error_with_invalid_query(self):
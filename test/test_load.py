@@ -0,0 +1,75 @@
+import unittest
+
+from src import REST
+from src.REST.load import LoadRun, percentile
+
+from .server import JSONServer
+
+
+class TestPercentile(unittest.TestCase):
+    def test_nearest_rank(self):
+        ordered = list(range(1, 101))
+        self.assertEqual(percentile(ordered, 50), 50)
+        self.assertEqual(percentile(ordered, 90), 90)
+        self.assertEqual(percentile(ordered, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_summary(self):
+        run = LoadRun(count=3)
+        run.start()
+        run.record(0.1, 200)
+        run.record(0.3, 200, valid=False)
+        run.record(error="Timeout")
+        run.finish()
+        summary = run.summary()
+        self.assertEqual(summary["requests"], 3)
+        self.assertEqual(summary["statuses"], {"200": 2})
+        self.assertEqual(summary["errors"], {"Timeout": 1})
+        self.assertEqual(summary["invalid"], 1)
+        self.assertEqual(summary["latency"]["max"], 0.3)
+
+
+class TestRunLoad(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = JSONServer().__enter__()
+        self.library = REST.REST(self.server.url, instances="[]")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.library.close()
+        self.server.__exit__(None, None, None)
+        return super().tearDown()
+
+    def test_one_instance_for_the_run(self):
+        response = self.library.run_load(
+            {"endpoint": "/users/1"}, requests=50, concurrency=4
+        )
+        self.assertEqual(len(self.library.instances), 1)
+        self.assertEqual(response["requests"], 50)
+        self.assertEqual(response["statuses"], {"200": 50})
+        self.assertEqual(response["invalid"], 0)
+        self.assertEqual(
+            sorted(response["latency"]),
+            ["max", "mean", "min", "p50", "p90", "p99"],
+        )
+        self.library.integer("response statuses 200", 50)
+        self.library.number("response latency p99", minimum=0)
+
+    def test_rate_and_duration(self):
+        response = self.library.run_load(
+            {"endpoint": "/users/1"}, duration=0.5, rate=20, concurrency=2
+        )
+        self.assertLessEqual(response["requests"], 10)
+        self.assertGreaterEqual(response["requests"], 8)
+
+    def test_invalid_responses_are_counted(self):
+        self.library.expect_response({"status": {"enum": [201]}})
+        response = self.library.run_load(
+            {"endpoint": "/users/1"}, requests=5, validate=True
+        )
+        self.assertEqual(response["invalid"], 5)
+
+    def test_requests_or_duration_is_required(self):
+        self.assertRaises(
+            RuntimeError, self.library.run_load, {"endpoint": "/users/1"}
+        )
@@ -0,0 +1,131 @@
+import os
+import unittest
+
+from src import REST
+from src.REST.parallel import ParallelValidator
+from src.REST.validators import ValidatorCache, error_messages
+
+from .server import JSONServer
+
+
+class TestParallelValidator(unittest.TestCase):
+    schema = {
+        "type": "object",
+        "properties": {
+            "users": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"id": {"type": "integer", "minimum": 0}},
+                    "required": ["id"],
+                },
+            },
+        },
+    }
+
+    def users(self, count):
+        return {"users": [{"id": id} for id in range(count)]}
+
+    def setUp(self):
+        self.parallel = ParallelValidator(ValidatorCache(), 2, 1, 10)
+
+    def tearDown(self):
+        self.parallel.close()
+
+    def validate(self, value, max_errors=1, schema=None):
+        self.parallel.max_errors = max_errors
+        messages = self.parallel.errors(schema or self.schema, value)
+        return "\n\n".join(messages) or None
+
+    def assert_same_as_in_process(self, value, schema=None):
+        schema = schema or self.schema
+        for max_errors in (1, 2, 10):
+            expected = error_messages(
+                ValidatorCache().get(schema), value, max_errors
+            )
+            self.assertTrue(expected)
+            self.assertEqual(
+                self.validate(value, max_errors, schema),
+                "\n\n".join(expected),
+            )
+
+    def test_pool_and_schemas_are_reused(self):
+        self.assertIsNone(self.validate(self.users(100)))
+        executor, directory = self.parallel._pool()
+        value = self.users(50)
+        value["users"][20]["id"] = -1
+        self.assertIn("users'][20]", self.validate(value))
+        self.assertIs(self.parallel._pool()[0], executor)
+        self.assertEqual(len(os.listdir(directory)), 1)
+        self.parallel.close()
+        self.assertIsNone(self.parallel.executor)
+        self.assertFalse(os.path.exists(directory))
+
+    def test_errors_are_those_of_jsonschema(self):
+        value = self.users(100)
+        value["users"][3]["id"] = "3"
+        value["users"][50] = {}
+        value["users"][60]["id"] = -1
+        value["users"][97] = []
+        self.assert_same_as_in_process(value)
+
+    def test_first_errors_in_order(self):
+        value = self.users(100)
+        for index in (3, 50, 97):
+            value["users"][index]["id"] = "%d" % index
+        message = self.validate(value, max_errors=2)
+        first, second = message.split("\n\n'50'")
+        self.assertIn("On instance['users'][3]['id']", first)
+        self.assertIn("On instance['users'][50]['id']", second)
+        self.assertNotIn("[97]", message)
+
+    def test_valid_and_small_arrays(self):
+        self.assertIsNone(self.validate(self.users(100)))
+        value = self.users(5)
+        value["users"][1]["id"] = -1
+        self.assertIn("On instance['users'][1]['id']", self.validate(value))
+
+    def test_rest_of_the_schema_is_validated(self):
+        schema = dict(self.schema, required=["total"])
+        self.assertIn("'total' is a required", self.validate({}, 1, schema))
+        value = self.users(100)
+        value["users"][3]["id"] = -1
+        self.assert_same_as_in_process(value, schema)
+
+    def test_schema_with_references_is_not_split(self):
+        schema = {
+            "items": {"$ref": "#/$defs/id"},
+            "$defs": {"id": {"type": "integer"}},
+        }
+        message = self.validate(list(range(20)) + [None], schema=schema)
+        self.assertIn("None is not of type 'integer'", message)
+
+
+class TestParallelValidation(unittest.TestCase):
+    def test_errors_do_not_depend_on_the_workers(self):
+        body = list(range(20)) + ["20", 21, None]
+        schema = {"properties": {"body": {"items": {"type": "integer"}}}}
+        messages = []
+        with JSONServer() as server:
+            for workers in (0, 2):
+                library = REST.REST(
+                    server.url,
+                    instances="[]",
+                    validation_workers=workers,
+                    validation_errors=2,
+                )
+                if library._parallel:
+                    library._parallel.min_items = 10
+                library.expect_response_body(schema)
+                library.post("/numbers", list(range(20)))
+                with self.assertRaises(AssertionError) as error:
+                    library.post("/numbers", body)
+                library.close()
+                messages.append(str(error.exception))
+        self.assertEqual(messages[0], messages[1])
+        self.assertIn("On instance['body'][20]", messages[1])
+        self.assertIn("On instance['body'][22]", messages[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
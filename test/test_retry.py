@@ -0,0 +1,162 @@
+import time
+import unittest
+from threading import Lock
+
+from requests import Response
+from requests.exceptions import ConnectionError, SSLError
+
+from src import REST
+from src.REST.retry import hedge_delay, new_policy, retry_delay
+
+from .server import JSONHandler, JSONServer
+
+
+def new_response(status, headers=None):
+    response = Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return response
+
+
+class TestPolicy(unittest.TestCase):
+    def test_defaults_are_updated(self):
+        policy = new_policy({"retries": 2, "backoff": 1})
+        self.assertEqual(policy["retries"], 2)
+        self.assertEqual(policy["backoff"], 1)
+        self.assertEqual(policy["statuses"], [429, 502, 503, 504])
+        self.assertEqual(new_policy(3)["retries"], 3)
+        self.assertEqual(new_policy({"jitter": False}, policy)["retries"], 2)
+
+    def test_invalid_options(self):
+        for value in (
+            {"retry": 1},
+            {"retries": -1},
+            {"statuses": ["503"]},
+            {"hedge": "fast"},
+        ):
+            self.assertRaises(RuntimeError, new_policy, value)
+
+    def test_retried_statuses_and_errors(self):
+        policy = new_policy({"retries": 1, "jitter": False})
+        self.assertEqual(retry_delay(policy, 0, "GET", new_response(503)), 0.1)
+        self.assertIsNone(retry_delay(policy, 0, "GET", new_response(500)))
+        self.assertIsNone(retry_delay(policy, 1, "GET", new_response(503)))
+        self.assertEqual(
+            retry_delay(policy, 0, "GET", error=ConnectionError()), 0.1
+        )
+        self.assertIsNone(retry_delay(policy, 0, "GET", error=SSLError()))
+
+    def test_idempotent_only(self):
+        policy = new_policy({"retries": 1})
+        self.assertIsNone(retry_delay(policy, 0, "POST", new_response(503)))
+        policy = new_policy({"retries": 1, "idempotentOnly": False})
+        self.assertIsNotNone(retry_delay(policy, 0, "POST", new_response(503)))
+
+    def test_exponential_backoff_with_jitter(self):
+        policy = new_policy({"retries": 10, "backoff": 1, "maxDelay": 5})
+        for retried, maximum in ((0, 1), (1, 2), (2, 4), (5, 5)):
+            delay = retry_delay(policy, retried, "GET", new_response(502))
+            self.assertTrue(0 <= delay <= maximum)
+
+    def test_retry_after(self):
+        policy = new_policy({"retries": 1, "maxDelay": 30})
+        response = new_response(429, {"Retry-After": "7"})
+        self.assertEqual(retry_delay(policy, 0, "GET", response), 7)
+        response = new_response(429, {"Retry-After": "120"})
+        self.assertEqual(retry_delay(policy, 0, "GET", response), 30)
+        response = new_response(
+            503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        )
+        self.assertEqual(retry_delay(policy, 0, "GET", response), 0)
+
+    def test_hedge_delay(self):
+        self.assertEqual(
+            hedge_delay(new_policy({"hedge": 0.2}), "GET", []), 0.2
+        )
+        policy = new_policy({"hedge": "p90"})
+        self.assertIsNone(hedge_delay(policy, "GET", [1, 2, 3]))
+        latencies = [i / 10 for i in range(1, 11)]
+        self.assertEqual(hedge_delay(policy, "GET", latencies), 0.9)
+        self.assertIsNone(hedge_delay(policy, "POST", latencies))
+
+
+class FlakyHandler(JSONHandler):
+    failures = {}
+    lock = Lock()
+
+    def _respond(self):
+        with self.lock:
+            remaining = self.failures.get(self.path, 0)
+            self.failures[self.path] = remaining - 1
+        if remaining > 0:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/slow" and remaining == 0:
+            time.sleep(0.5)
+        super()._respond()
+
+    do_GET = do_POST = _respond
+
+
+class TestRetries(unittest.TestCase):
+    def setUp(self):
+        FlakyHandler.failures = {}
+        self.server = JSONServer(FlakyHandler).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_retried_until_success(self):
+        FlakyHandler.failures["/users"] = 2
+        library = REST.REST(self.server.url, instances="[]", retry=3)
+        response = library.get("/users")
+        library.close()
+        self.assertEqual(response["status"], 200)
+        self.assertEqual(
+            [attempt["status"] for attempt in response["attempts"]],
+            [503, 503, 200],
+        )
+        self.assertEqual(response["attempts"][0]["delay"], 0)
+
+    def test_last_response_is_used_when_retries_run_out(self):
+        FlakyHandler.failures["/users"] = 5
+        library = REST.REST(self.server.url, instances="[]")
+        response = library.get("/users", retry={"retries": 1})
+        library.close()
+        self.assertEqual(response["status"], 503)
+        self.assertEqual(len(response["attempts"]), 2)
+
+    def test_post_is_not_retried(self):
+        FlakyHandler.failures["/users"] = 1
+        library = REST.REST(self.server.url, instances="[]", retry=3)
+        response = library.post("/users", {"id": 1})
+        library.close()
+        self.assertEqual(response["status"], 503)
+        self.assertEqual(len(response["attempts"]), 1)
+
+    def test_no_attempts_without_policy(self):
+        library = REST.REST(self.server.url, instances="[]")
+        response = library.get("/users")
+        library.close()
+        self.assertNotIn("attempts", response)
+
+    def test_slow_request_is_hedged(self):
+        library = REST.REST(self.server.url, instances="[]")
+        started = time.perf_counter()
+        response = library.get("/slow", retry={"hedge": 0.1})
+        seconds = time.perf_counter() - started
+        library.close()
+        self.assertEqual(response["status"], 200)
+        self.assertLess(seconds, 0.4)
+        self.assertEqual(
+            [attempt["hedge"] for attempt in response["attempts"]],
+            [False, True],
+        )
+        self.assertEqual(response["attempts"][1]["status"], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
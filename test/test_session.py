@@ -0,0 +1,220 @@
+import time
+import unittest
+from datetime import timedelta
+from importlib.util import find_spec
+from unittest.mock import MagicMock
+
+from requests import Request
+from requests.exceptions import TooManyRedirects
+
+from src import REST
+from src.REST.transport import Transport
+
+from .server import JSONHandler, JSONServer
+
+
+class SlowHandler(JSONHandler):
+    def _respond(self):
+        time.sleep(0.2)
+        super()._respond()
+
+    do_GET = _respond
+
+
+class CookieHandler(JSONHandler):
+    cookies = []
+
+    def _respond(self):
+        self.cookies.append(self.headers.get("Cookie"))
+        super()._respond()
+
+    def end_headers(self):
+        self.send_header("Set-Cookie", "sid=abc; Path=/")
+        super().end_headers()
+
+    do_GET = _respond
+
+
+class RedirectHandler(JSONHandler):
+    def do_GET(self):
+        self.send_response(302)
+        self.send_header("Location", self.path)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+TRANSPORTS = ["requests"] + (["http2"] if find_spec("httpx") else [])
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = JSONServer().__enter__()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.server.__exit__(None, None, None)
+        return super().tearDown()
+
+    def test_pool_is_configured_on_import(self):
+        library = REST.REST(pool_connections=2, pool_maxsize=5, max_retries=3)
+        adapter = library._transport.session.get_adapter("http://localhost")
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 5)
+        self.assertEqual(adapter.max_retries.total, 3)
+        library.close()
+
+    def test_pool_key_has_the_cached_ssl_context(self):
+        library = REST.REST("https://localhost")
+        adapter = library._transport.session.get_adapter("https://localhost")
+        request = Request("GET", "https://localhost/users").prepare()
+        context = adapter.ssl_contexts.get(True, None)
+        _, pool_kwargs = adapter.build_connection_pool_key_attributes(
+            request, True, None
+        )
+        self.assertIs(pool_kwargs["ssl_context"], context)
+        pool = adapter.get_connection_with_tls_context(request, True)
+        self.assertIs(pool.conn_kw["ssl_context"], context)
+        library.close()
+
+    def test_connection_is_reused(self):
+        library = REST.REST(self.server.url)
+        first = library.get("/users/1")
+        second = library.get("/users/2")
+        self.assertEqual(first["connection"]["reused"], False)
+        self.assertEqual(second["connection"]["reused"], True)
+        self.assertEqual(second["connection"]["protocol"], "HTTP/1.1")
+        self.assertEqual(second["body"]["path"], "/users/2")
+        library.close()
+
+    def test_connection_is_not_reused_without_keep_alive(self):
+        library = REST.REST(self.server.url, keep_alive=False)
+        library.get("/users/1")
+        second = library.get("/users/2")
+        self.assertEqual(second["connection"]["reused"], False)
+        library.close()
+
+    def test_unknown_transport(self):
+        self.assertRaises(RuntimeError, REST.REST, transport="http3")
+
+    def test_transport_without_send(self):
+        class Incomplete(Transport):
+            pass
+
+        self.assertRaises(TypeError, Incomplete, 10, 10, 0, True)
+
+    def test_cookies_are_not_persisted(self):
+        for transport in TRANSPORTS:
+            with self.subTest(transport=transport):
+                CookieHandler.cookies = []
+                with JSONServer(CookieHandler) as server:
+                    library = REST.REST(server.url, transport=transport)
+                    library.get("/login")
+                    library.get("/users")
+                    library.close()
+                self.assertEqual(CookieHandler.cookies, [None, None])
+
+    def test_errors_are_requests_exceptions(self):
+        for transport in TRANSPORTS:
+            with self.subTest(transport=transport):
+                with JSONServer(RedirectHandler) as server:
+                    library = REST.REST(server.url, transport=transport)
+                    self.assertRaises(TooManyRedirects, library.get, "/loop")
+                    library.close()
+
+
+@unittest.skipUnless(find_spec("httpx"), "httpx is not installed")
+class TestHTTP2Transport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = JSONServer().__enter__()
+        self.library = REST.REST(
+            self.server.url, transport="http2", instances="[]"
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.library.close()
+        self.server.__exit__(None, None, None)
+        return super().tearDown()
+
+    def test_instance_is_the_same_as_with_requests(self):
+        first = self.library.post("/users?q=1", {"id": 1})
+        second = self.library.get("/users/1")
+        instance = self.library.instances[0]
+        self.assertEqual(first["status"], 200)
+        self.assertEqual(first["reason"], "OK")
+        self.assertEqual(first["body"]["body"], {"id": 1})
+        self.assertEqual(first["body"]["path"], "/users?q=1")
+        self.assertEqual(first["headers"]["Content-Type"], "application/json")
+        self.assertEqual(instance["request"]["body"], {"id": 1})
+        self.assertEqual(first["connection"]["protocol"], "HTTP/1.1")
+        self.assertEqual(first["connection"]["reused"], False)
+        self.assertEqual(second["connection"]["reused"], True)
+        self.assertGreater(first["timings"]["connect"], 0)
+        self.assertGreater(second["timings"]["ttfb"], 0)
+
+    def test_timeout_fails_the_keyword(self):
+        with JSONServer(SlowHandler) as server:
+            self.assertRaises(
+                AssertionError, self.library.get, server.url, timeout=0.05
+            )
+
+
+class TestTimings(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = JSONServer().__enter__()
+        self.library = REST.REST(self.server.url)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.library.close()
+        self.server.__exit__(None, None, None)
+        return super().tearDown()
+
+    def test_phases_are_measured(self):
+        first = self.library.get("/users/1")["timings"]
+        second = self.library.get("/users/2")["timings"]
+        for phase in ("dns", "connect", "ttfb", "download", "total"):
+            self.assertGreaterEqual(first[phase], 0)
+        self.assertGreater(first["connect"], 0)
+        self.assertEqual(first["tls"], 0)
+        self.assertEqual(second["connect"], 0)
+        self.assertGreaterEqual(second["total"], second["ttfb"])
+        for phase in ("decode", "validation", "inference"):
+            self.assertGreaterEqual(second[phase], 0)
+
+    def test_seconds_include_whole_seconds(self):
+        response = MagicMock()
+        response.json.return_value = {}
+        response.elapsed = timedelta(seconds=2, microseconds=300000)
+        self.assertEqual(self.library._new_response(response)["seconds"], 2.3)
+
+
+class TestRequests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = JSONServer().__enter__()
+        self.library = REST.REST(self.server.url, instances="[]")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.library.close()
+        self.server.__exit__(None, None, None)
+        return super().tearDown()
+
+    def test_headers_are_not_shared_between_instances(self):
+        self.library.get("/users", headers={"X-Call": "1"})
+        self.library.set_headers({"X-Suite": "a"})
+        self.library.get("/users")
+        self.library.set_headers({"X-Suite": "b"})
+        first, second = [i["request"] for i in self.library.instances]
+        self.assertEqual(first["headers"]["X-Call"], "1")
+        self.assertNotIn("X-Suite", first["headers"])
+        self.assertEqual(second["headers"]["X-Suite"], "a")
+        self.assertNotIn("X-Call", second["headers"])
+        self.assertNotIn("X-Call", self.library.request["headers"])
+        self.assertEqual(self.library.request["headers"]["X-Suite"], "b")
+
+    def test_request_of_library_is_not_modified(self):
+        before = repr(self.library.request)
+        self.library.get("/users?a=1", timeout=2, headers={"X-Call": "1"})
+        self.library.post("/users", {"id": 1}, allow_redirects=False)
+        self.assertEqual(repr(self.library.request), before)
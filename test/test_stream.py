@@ -0,0 +1,109 @@
+import io
+import json
+import unittest
+from importlib.util import find_spec
+
+from src import REST
+from src.REST.stream import parse_stream, projection_prefix
+
+from .server import JSONHandler, JSONServer
+
+EXPORT = {
+    "total": 3,
+    "users": [
+        {"id": 1, "email": "a@example.com", "tags": ["x"]},
+        {"id": 2, "email": "b@example.com", "score": 1.5},
+        {"id": 3},
+    ],
+}
+
+
+class ExportHandler(JSONHandler):
+    def do_GET(self):
+        payload = json.dumps(EXPORT).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestProjectionPrefix(unittest.TestCase):
+    def test_supported_paths(self):
+        self.assertEqual(projection_prefix("$"), "")
+        self.assertEqual(projection_prefix("$.users[*].id"), "users.item.id")
+        self.assertEqual(projection_prefix("$[*]['a b']"), "item.a b")
+
+    def test_unsupported_paths(self):
+        for path in ("users", "$..id", "$.users[0]", "$.users[?(@.id)]"):
+            self.assertRaises(RuntimeError, projection_prefix, path)
+
+
+@unittest.skipUnless(find_spec("ijson"), "ijson is not installed")
+class TestParseStream(unittest.TestCase):
+    def parse(self, document, projection=()):
+        reader = io.BytesIO(json.dumps(document).encode("utf-8"))
+        return parse_stream(reader, projection)
+
+    def test_only_projected_parts_are_kept(self):
+        body, summary = self.parse(EXPORT, ["$.total", "$.users[*].email"])
+        self.assertEqual(
+            body,
+            {
+                "total": 3,
+                "users": [
+                    {"email": "a@example.com"},
+                    {"email": "b@example.com"},
+                ],
+            },
+        )
+        self.assertEqual(summary["items"], 2)
+        self.assertEqual(summary["bytes"], len(json.dumps(EXPORT)))
+
+    def test_whole_body(self):
+        self.assertEqual(self.parse(EXPORT, ["$"])[0], EXPORT)
+
+    def test_shape(self):
+        shape = self.parse(EXPORT)[1]["shape"]
+        user = shape["properties"]["users"]["items"]
+        self.assertEqual(shape["type"], "object")
+        self.assertEqual(user["properties"]["id"], {"type": "integer"})
+        self.assertEqual(user["properties"]["score"], {"type": "number"})
+        self.assertEqual(
+            user["properties"]["tags"],
+            {"type": "array", "items": {"type": "string"}},
+        )
+
+    def test_root_array(self):
+        body, summary = self.parse([1, {"a": 2}, None], ["$[*].a"])
+        self.assertEqual(body, [None, {"a": 2}])
+        self.assertEqual(summary["items"], 3)
+
+    def test_invalid_json(self):
+        self.assertRaises(
+            ValueError, parse_stream, io.BytesIO(b'{"a": '), ["$"]
+        )
+
+
+@unittest.skipUnless(find_spec("ijson"), "ijson is not installed")
+class TestStreamingKeywords(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = JSONServer(ExportHandler).__enter__()
+        self.library = REST.REST(self.server.url, instances="[]")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.library.close()
+        self.server.__exit__(None, None, None)
+        return super().tearDown()
+
+    def test_get_with_projection(self):
+        response = self.library.get("/export", projection="$.users[*].id")
+        self.assertEqual(
+            response["body"], {"users": [{"id": 1}, {"id": 2}, {"id": 3}]}
+        )
+        self.assertEqual(response["stream"]["items"], 2)
+        self.library.integer("$.users[*].id", minimum=1)
+        again = self.library.get("/export", stream=True)
+        self.assertIsNone(again["body"])
+        self.assertTrue(again["connection"]["reused"])
@@ -0,0 +1,87 @@
+import unittest
+
+from src import REST
+from src.REST.codec import loads
+from src.REST.template import RequestTemplate, encode_json
+
+from .server import JSONServer
+
+
+class TestRequestTemplate(unittest.TestCase):
+    def new_template(self, **request):
+        defaults = {
+            "url": "http://api.test/users/{id}",
+            "path": "/users/{id}",
+            "query": {"a": "1"},
+            "headers": {"Accept": "application/json"},
+            "body": None,
+            "data": None,
+        }
+        return RequestTemplate({**defaults, **request})
+
+    def test_placeholders_are_filled(self):
+        request, _ = self.new_template().new_request(path={"id": "a b/c"})
+        self.assertEqual(request["url"], "http://api.test/users/a%20b%2Fc")
+        self.assertEqual(request["path"], "/users/a%20b%2Fc")
+
+    def test_missing_placeholder(self):
+        self.assertRaises(RuntimeError, self.new_template().new_request)
+
+    def test_changes_do_not_modify_the_template(self):
+        template = self.new_template(path="/users", url="http://api.test/users")
+        request, _ = template.new_request(
+            query={"b": "2"}, headers={"X-Call": "1"}
+        )
+        self.assertEqual(request["query"], {"a": "1", "b": "2"})
+        self.assertEqual(request["headers"]["X-Call"], "1")
+        self.assertEqual(template.request["query"], {"a": "1"})
+        self.assertNotIn("X-Call", template.request["headers"])
+
+    def test_body_is_encoded_once(self):
+        template = self.new_template(body={"id": 1})
+        self.assertEqual(loads(template.content), {"id": 1})
+        _, content = template.new_request(path={"id": 1})
+        self.assertIs(content, template.content)
+        _, content = template.new_request(path={"id": 1}, body=[1])
+        self.assertEqual(loads(content), [1])
+        self.assertIsNone(encode_json({"id": 1}, data={"a": "b"}))
+
+
+class TestTemplateKeywords(unittest.TestCase):
+    def setUp(self):
+        self.server = JSONServer().__enter__()
+        self.library = REST.REST(self.server.url, instances="[]")
+
+    def tearDown(self):
+        self.library.close()
+        self.server.__exit__(None, None, None)
+
+    def test_send_template(self):
+        self.library.define_request_template(
+            "user", {"endpoint": "/users/{id}?expand=true"}
+        )
+        response = self.library.send_template("user", path={"id": 7})
+        self.assertEqual(response["body"]["path"], "/users/7?expand=true")
+        request = self.library.instances[-1]["request"]
+        self.assertEqual(request["method"], "GET")
+        self.assertEqual(request["query"], {"expand": "true"})
+        self.assertIn("timestamp", request)
+
+    def test_instance_is_the_same_as_with_http_keywords(self):
+        self.library.define_request_template(
+            "new user", '{"method": "POST", "endpoint": "/users"}'
+        )
+        sent = self.library.send_template("new user", body={"id": 11})
+        posted = self.library.post("/users", {"id": 11})
+        self.assertEqual(sent["body"], posted["body"])
+        templated, keyword = [i["request"] for i in self.library.instances]
+        for request in (templated, keyword):
+            del request["timestamp"]
+        self.assertEqual(templated, keyword)
+
+    def test_unknown_template(self):
+        self.assertRaises(RuntimeError, self.library.send_template, "nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+from src import REST
+from src.REST.transport import SSLContexts
+
+from .server import JSONServer
+
+
+@unittest.skipUnless(shutil.which("openssl"), "openssl is not installed")
+class TestTLS(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.cert = os.path.join(cls.directory, "cert.pem")
+        cls.key = os.path.join(cls.directory, "key.pem")
+        subprocess.run(
+            [
+                "openssl",
+                "req",
+                "-x509",
+                "-newkey",
+                "rsa:2048",
+                "-nodes",
+                "-days",
+                "1",
+                "-subj",
+                "/CN=localhost",
+                "-addext",
+                "subjectAltName=DNS:localhost,IP:127.0.0.1",
+                "-keyout",
+                cls.key,
+                "-out",
+                cls.cert,
+            ],
+            check=True,
+            capture_output=True,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.server = JSONServer()
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.cert, self.key)
+        self.server.httpd.socket = context.wrap_socket(
+            self.server.httpd.socket, server_side=True
+        )
+        self.server.url = self.server.url.replace("http://", "https://")
+        self.server.__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def get_twice(self, **options):
+        library = REST.REST(
+            self.server.url,
+            ssl_verify=self.cert,
+            instances="[]",
+            keep_alive=False,
+            **options,
+        )
+        try:
+            return library.get("/users"), library.get("/users")
+        finally:
+            library.close()
+
+    def test_session_is_resumed(self):
+        first, second = self.get_twice()
+        self.assertEqual(first["status"], 200)
+        self.assertFalse(first["connection"]["reused"])
+        self.assertFalse(second["connection"]["reused"])
+        self.assertFalse(first["connection"]["tlsResumed"])
+        self.assertTrue(second["connection"]["tlsResumed"])
+
+    @unittest.skipUnless(find_spec("httpx"), "httpx is not installed")
+    def test_session_is_resumed_with_http2_transport(self):
+        first, second = self.get_twice(transport="http2")
+        self.assertFalse(first["connection"]["tlsResumed"])
+        self.assertTrue(second["connection"]["tlsResumed"])
+
+    def test_context_is_cached(self):
+        contexts = SSLContexts()
+        context = contexts.get(self.cert, None)
+        self.assertIs(contexts.get(self.cert, None), context)
+        self.assertIsNot(contexts.get(True, None), context)
+        self.assertIsNot(
+            contexts.get(self.cert, [self.cert, self.key]), context
+        )
+
+    def test_context_is_created_again_if_file_changes(self):
+        contexts = SSLContexts()
+        context = contexts.get(self.cert, None)
+        stat = os.stat(self.cert)
+        os.utime(self.cert, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertIsNot(contexts.get(self.cert, None), context)
+
+    def test_changing_ssl_verify_uses_another_context(self):
+        library = REST.REST(self.server.url, instances="[]")
+        self.assertRaises(AssertionError, library.get, "/users")
+        library.set_ssl_verify(self.cert)
+        self.assertEqual(library.get("/users")["status"], 200)
+        library.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
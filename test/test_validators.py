@@ -0,0 +1,112 @@
+import unittest
+
+from jsonschema import Draft4Validator, Draft202012Validator, ValidationError
+
+from src import REST
+from src.REST.validators import CompiledValidator, ValidatorCache
+
+
+class TestValidatorCache(unittest.TestCase):
+    def test_same_content_is_compiled_once(self):
+        cache = ValidatorCache()
+        validator = cache.get({"type": "integer", "minimum": 1})
+        self.assertIs(cache.get({"minimum": 1, "type": "integer"}), validator)
+        self.assertIsNot(cache.get({"type": "integer"}), validator)
+
+    def test_modified_schema_is_compiled_again(self):
+        cache = ValidatorCache()
+        schema = {"type": "integer"}
+        cache.get(schema).validate(5)
+        schema["maximum"] = 1
+        self.assertFalse(cache.get(schema).is_valid(5))
+        self.assertTrue(cache.get({"type": "integer"}).is_valid(5))
+
+    def test_draft_of_the_top_schema(self):
+        cache = ValidatorCache()
+        top = {"$schema": "http://json-schema.org/draft-04/schema#"}
+        self.assertIsInstance(cache.get({}, top), Draft4Validator)
+        self.assertIsInstance(cache.get({}), Draft202012Validator)
+
+    def test_least_recently_used_are_dropped(self):
+        cache = ValidatorCache(maxsize=2)
+        first = cache.get({"minimum": 1})
+        cache.get({"minimum": 2})
+        cache.get({"minimum": 1})
+        cache.get({"minimum": 3})
+        self.assertEqual(len(cache.validators), 2)
+        self.assertIs(cache.get({"minimum": 1}), first)
+
+
+class TestCompiledValidator(unittest.TestCase):
+    schema = {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"id": {"type": "integer", "minimum": 1}},
+            "required": ["id"],
+        },
+    }
+
+    def test_compiled_when_validated_against_again(self):
+        cache = ValidatorCache(compiled=True)
+        self.assertIsInstance(cache.get(self.schema), Draft202012Validator)
+        validator = cache.get(self.schema)
+        self.assertIsInstance(validator, CompiledValidator)
+        self.assertIs(cache.get(self.schema), validator)
+        validator.validate([{"id": 1}, {"id": 2}])
+
+    def test_errors_are_those_of_jsonschema(self):
+        cache = ValidatorCache(compiled=True)
+        interpreted = cache.get(self.schema)
+        compiled = cache.get(self.schema)
+        for value in ([{"id": 0}], [{}], [{"id": True}], {"id": 1}):
+            with self.assertRaises(ValidationError) as expected:
+                interpreted.validate(value)
+            with self.assertRaises(ValidationError) as reality:
+                compiled.validate(value)
+            self.assertEqual(str(reality.exception), str(expected.exception))
+            self.assertFalse(compiled.is_valid(value))
+
+    def test_not_compiled_keywords_are_left_to_jsonschema(self):
+        cache = ValidatorCache(compiled=True)
+        for schema in (
+            {"type": "string", "format": "date"},
+            {"items": {"$ref": "#/$defs/id"}, "$defs": {"id": {}}},
+            {"not": {"type": "string"}},
+            {"items": [{"type": "integer"}]},
+            {"properties": {"active": {"enum": [1, 2]}}},
+            {"multipleOf": 0.01},
+        ):
+            cache.get(schema)
+            self.assertNotIsInstance(cache.get(schema), CompiledValidator)
+
+    def test_same_result_on_every_validation(self):
+        cache = ValidatorCache(compiled=True)
+        for schema, value in (
+            ({"multipleOf": 0.01}, 19.99),
+            ({"multipleOf": 0.1}, 0.3),
+            ({"type": "number", "minimum": 20}, 19.99),
+        ):
+            results = [cache.get(schema).is_valid(value) for _ in range(3)]
+            self.assertEqual(results, [False] * 3, schema)
+
+    def test_booleans_are_not_numbers(self):
+        cache = ValidatorCache(compiled=True)
+        schema = {"anyOf": [{"type": "boolean"}, {"minimum": 2}]}
+        cache.get(schema)
+        validator = cache.get(schema)
+        self.assertIsInstance(validator, CompiledValidator)
+        self.assertTrue(validator.is_valid(True))
+        self.assertFalse(validator.is_valid(1))
+
+    def test_validator_on_library_import(self):
+        library = REST.REST("localhost", instances="[]", validator="compiled")
+        self.assertTrue(library._validators.compiled)
+        library.close()
+        self.assertRaises(
+            RuntimeError, REST.REST, "localhost", validator="compiler"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()